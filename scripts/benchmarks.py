@@ -4,8 +4,10 @@ import time
 from pathlib import Path
 
 from phys_pipeline.cache import DiskCache
+from phys_pipeline.dag import PipelineGraph, build_dag
 from phys_pipeline.dag_cache import DagCache
 from phys_pipeline.executor import DagExecutor
+from phys_pipeline.priority import PriorityFn, fifo, upward_rank
 from phys_pipeline.scheduler import LocalScheduler
 from phys_pipeline.types import (
     NodeResources,
@@ -28,6 +30,51 @@ class AddStage(PipelineStage[SimpleState, AddConfig]):
         return StageResult(state=new_state)
 
 
+class SleepConfig(StageConfig):
+    seconds: float = 0.01
+
+
+class SleepStage(PipelineStage[SimpleState, SleepConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        time.sleep(self.cfg.seconds)
+        return StageResult(state=state)
+
+    def estimated_cost(self) -> float:
+        return self.cfg.seconds
+
+
+def _skewed_dag(n_short: int = 12, chain: int = 4) -> list[NodeSpec]:
+    # Short independent nodes listed first, so FIFO starts the long chain last.
+    nodes = [
+        NodeSpec(id=f"short{i}", stage=SleepStage(SleepConfig(seconds=0.01)))
+        for i in range(n_short)
+    ]
+    for i in range(chain):
+        nodes.append(
+            NodeSpec(
+                id=f"chain{i}",
+                deps=[f"chain{i - 1}"] if i else [],
+                stage=SleepStage(SleepConfig(seconds=0.02)),
+            )
+        )
+    return nodes
+
+
+def benchmark_priority() -> None:
+    def makespan(priority: PriorityFn) -> float:
+        executor = DagExecutor(
+            scheduler=LocalScheduler(max_workers=4, max_cpu=4), priority=priority
+        )
+        start = time.perf_counter()
+        executor.run(SimpleState(payload=0), _skewed_dag())
+        return time.perf_counter() - start
+
+    print(
+        f"Priority benchmark (skewed DAG): fifo={makespan(fifo):.4f}s "
+        f"upward_rank={makespan(upward_rank):.4f}s"
+    )
+
+
 def benchmark_cache(tmp_root: Path) -> None:
     cache_backend = DiskCache(tmp_root)
     cache = DagCache(cache_backend)
@@ -61,8 +108,48 @@ def benchmark_scheduler() -> None:
     print(f"Scheduler benchmark: {elapsed:.4f}s")
 
 
+class NoopStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=state)
+
+
+def _layered_dag(n_nodes: int, width: int = 100) -> list[NodeSpec]:
+    stage = NoopStage(StageConfig())
+    return [
+        NodeSpec(id=f"n{i}", deps=[f"n{i - width}"] if i >= width else [], stage=stage)
+        for i in range(n_nodes)
+    ]
+
+
+def benchmark_graph(n_build: int = 100_000, n_run: int = 10_000) -> None:
+    nodes = _layered_dag(n_build)
+    start = time.perf_counter()
+    build_dag(nodes)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    PipelineGraph.from_nodes(nodes)
+    compiled = time.perf_counter() - start
+    print(f"Graph build ({n_build} nodes): build_dag={build:.4f}s PipelineGraph={compiled:.4f}s")
+
+    nodes = _layered_dag(n_run)
+    graph = PipelineGraph.from_nodes(nodes)
+    with DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1)) as executor:
+        executor.run(SimpleState(payload=0), graph, keep=())  # warm up the pool
+        timings = {}
+        for label, dag in (("node list", nodes), ("PipelineGraph", graph)):
+            start = time.perf_counter()
+            executor.run(SimpleState(payload=0), dag, keep=())
+            timings[label] = (time.perf_counter() - start) / n_run * 1e6
+    print(
+        f"Dispatch overhead ({n_run} no-op nodes): "
+        + " ".join(f"{label}={us:.1f}us/node" for label, us in timings.items())
+    )
+
+
 if __name__ == "__main__":
     root = Path(".benchmarks")
     root.mkdir(exist_ok=True)
     benchmark_cache(root)
     benchmark_scheduler()
+    benchmark_priority()
+    benchmark_graph()
@@ -5,21 +5,33 @@ from .cache import CacheConfig as CacheConfig
 from .cache import DiskCache as DiskCache
 from .cache import SharedDiskCache as SharedDiskCache
 from .cache import build_cache_backend as build_cache_backend
+from .cancellation import CancellationToken as CancellationToken
+from .cancellation import cancel_token as cancel_token
+from .dag import PipelineGraph as PipelineGraph
+from .dag_cache import AsyncDagCache as AsyncDagCache
 from .dag_cache import DagCache as DagCache
 from .executor import DagExecutor as DagExecutor
 from .executor import RetryPolicy as RetryPolicy
+from .hashing import HashEngine as HashEngine
 from .hpc import MockHpcScheduler as MockHpcScheduler
 from .hpc import PbsScheduler as PbsScheduler
 from .hpc import SlurmScheduler as SlurmScheduler
+from .incremental import IncrementalDagSession as IncrementalDagSession
+from .journal import RunJournal as RunJournal
 from .ml_artifacts import ModelArtifactPackager as ModelArtifactPackager
 from .pipeline import SequentialPipeline as SequentialPipeline
 from .policy import PolicyBag as PolicyBag
 from .record import ArtifactRecorder as ArtifactRecorder
 from .record import JSONLRecorder as JSONLRecorder
 from .scheduler import LocalScheduler as LocalScheduler
+from .scheduler import MemoryTracker as MemoryTracker
+from .scheduler import ProcessScheduler as ProcessScheduler
 from .scheduler import Scheduler as Scheduler
+from .sweep import LazySweep as LazySweep
 from .sweep import SweepSpec as SweepSpec
 from .sweep import expand_sweep as expand_sweep
+from .sweep_table import SweepTable as SweepTable
+from .trace import Tracer as Tracer
 from .types import DagState as DagState
 from .types import NodeResources as NodeResources
 from .types import NodeSpec as NodeSpec
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import uuid
+from typing import Any
+
+from .errors import StageCancelledError
+
+# Policy key under which ``DagExecutor`` passes the run's token to every stage.
+CANCEL_TOKEN_KEY = "cancel_token"
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared by a run and the stages it executes.
+
+    Long-running stages should poll ``token.cancelled`` (or call
+    ``raise_if_cancelled()``) between chunks of work. In-process the flag is a
+    ``threading.Event``; pickled copies sent to worker processes check a marker
+    file instead, so the token also works with ``ProcessScheduler``.
+    """
+
+    def __init__(self) -> None:
+        self._event: threading.Event | None = threading.Event()
+        self._marker = os.path.join(tempfile.gettempdir(), f"phys-cancel-{uuid.uuid4().hex}")
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event is not None:
+            return self._event.is_set()
+        return os.path.exists(self._marker)
+
+    def cancel(self) -> None:
+        if self._event is not None:
+            self._event.set()
+        with open(self._marker, "w", encoding="utf-8"):
+            pass
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise StageCancelledError("Run was cancelled.")
+
+    def close(self) -> None:
+        """Remove the cross-process marker; the in-process flag keeps its state."""
+        try:
+            os.unlink(self._marker)
+        except FileNotFoundError:
+            pass
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"_event": None, "_marker": self._marker}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._event = state["_event"]
+        self._marker = state["_marker"]
+
+
+def cancel_token(policy: Any) -> CancellationToken | None:
+    """Return the run's token from a stage's ``policy`` argument, if any."""
+    if policy is None:
+        return None
+    token = policy.get(CANCEL_TOKEN_KEY)
+    return token if isinstance(token, CancellationToken) else None
@@ -1,12 +1,32 @@
 from __future__ import annotations
 
+import gc
+import itertools
 from collections import deque
-from dataclasses import dataclass
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
 
 from .errors import DagCycleError, DagDuplicateNodeError, DagMissingDependencyError
+from .hashing import hash_node_cfg
 from .types import NodeSpec
 
 
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # Building containers for 10^5+ nodes otherwise triggers repeated full
+    # collections that scan every object allocated so far.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
 @dataclass(frozen=True, slots=True)
 class Dag:
     nodes_by_id: dict[str, NodeSpec]
@@ -15,14 +35,111 @@ class Dag:
     topo_order: list[str]
 
 
-@dataclass(frozen=True, slots=True)
+@dataclass(frozen=True, slots=True, eq=False)
 class PipelineGraph:
+    """A validated DAG compiled to integer indices, reusable across runs.
+
+    Node ``i`` is ``ids[i]``, numbered in topological order. Its dependencies are
+    ``dep_idx[dep_ptr[i]:dep_ptr[i + 1]]`` and its dependents
+    ``dependent_idx[dependent_ptr[i]:dependent_ptr[i + 1]]`` (CSR adjacency).
+    ``levels[i]`` is the length of the longest dependency chain ending at node
+    ``i``, so nodes on one level never depend on each other.
+
+    Pass a graph instead of a node list to ``DagExecutor`` to skip validation and
+    bookkeeping setup on every run; priorities and config hashes are computed
+    once per graph and reused.
+    """
+
     nodes: list[NodeSpec]
     dag: Dag
+    ids: list[str]
+    index: dict[str, int]
+    dep_ptr: np.ndarray
+    dep_idx: np.ndarray
+    dependent_ptr: np.ndarray
+    dependent_idx: np.ndarray
+    in_degree: np.ndarray
+    levels: np.ndarray
+    _priorities: dict[Callable[[Dag], dict[str, float]], dict[str, float]] = field(
+        default_factory=dict, repr=False
+    )
+    _cfg_hashes: dict[str, str | None] = field(default_factory=dict, repr=False)
 
     @classmethod
     def from_nodes(cls, nodes: list[NodeSpec]) -> PipelineGraph:
-        return cls(nodes=nodes, dag=build_dag(nodes))
+        with _gc_paused():
+            return cls._compile(nodes)
+
+    @classmethod
+    def _compile(cls, nodes: list[NodeSpec]) -> PipelineGraph:
+        dag = build_dag(nodes)
+        ids = dag.topo_order
+        index = {node_id: i for i, node_id in enumerate(ids)}
+        rows = [[index[dep] for dep in dag.deps[node_id]] for node_id in ids]
+        in_degree = np.fromiter(map(len, rows), dtype=np.int64, count=len(ids))
+        dep_ptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(in_degree, out=dep_ptr[1:])
+        dep_idx = np.fromiter(
+            itertools.chain.from_iterable(rows), dtype=np.int64, count=int(dep_ptr[-1])
+        )
+        # Transpose: owners of each dependency edge, grouped by the dependency.
+        owners = np.repeat(np.arange(len(ids), dtype=np.int64), in_degree)
+        dependent_idx = owners[np.argsort(dep_idx, kind="stable")]
+        dependent_ptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(dep_idx, minlength=len(ids)), out=dependent_ptr[1:])
+        levels = [0] * len(ids)
+        for i, row in enumerate(rows):
+            if row:
+                levels[i] = 1 + max(levels[dep] for dep in row)
+        return cls(
+            nodes=nodes,
+            dag=dag,
+            ids=ids,
+            index=index,
+            dep_ptr=dep_ptr,
+            dep_idx=dep_idx,
+            dependent_ptr=dependent_ptr,
+            dependent_idx=dependent_idx,
+            in_degree=in_degree,
+            levels=np.asarray(levels, dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def out_degree(self) -> np.ndarray:
+        return np.diff(self.dependent_ptr)
+
+    @property
+    def depth(self) -> int:
+        """Number of topological levels (longest chain length)."""
+        return int(self.levels.max()) + 1 if len(self.ids) else 0
+
+    def level(self, k: int) -> list[str]:
+        """Node ids on topological level ``k``."""
+        return [self.ids[i] for i in np.flatnonzero(self.levels == k)]
+
+    def priorities(self, priority: Callable[[Dag], dict[str, float]]) -> dict[str, float]:
+        """``priority(dag)``, computed on first use and cached on the graph."""
+        cached = self._priorities.get(priority)
+        if cached is None:
+            cached = self._priorities[priority] = priority(self.dag)
+        return cached
+
+    def cfg_hash(self, node_id: str) -> str | None:
+        """``hash_node_cfg`` of the node, cached on the graph."""
+        if node_id not in self._cfg_hashes:
+            self._cfg_hashes[node_id] = hash_node_cfg(self.dag.nodes_by_id[node_id])
+        return self._cfg_hashes[node_id]
+
+
+NodesLike = list[NodeSpec] | PipelineGraph
+
+
+def as_graph(nodes: NodesLike) -> PipelineGraph:
+    """Compile a node list (a ``PipelineGraph`` is returned unchanged)."""
+    return nodes if isinstance(nodes, PipelineGraph) else PipelineGraph.from_nodes(nodes)
 
 
 def build_dag(nodes: list[NodeSpec]) -> Dag:
@@ -50,7 +167,8 @@ def build_dag(nodes: list[NodeSpec]) -> Dag:
     while ready:
         node_id = ready.popleft()
         topo_order.append(node_id)
-        for dependent in sorted(reverse_deps[node_id]):
+        dependents = reverse_deps[node_id]
+        for dependent in sorted(dependents) if len(dependents) > 1 else dependents:
             in_degree[dependent] -= 1
             if in_degree[dependent] == 0:
                 ready.append(dependent)
@@ -64,3 +182,25 @@ def build_dag(nodes: list[NodeSpec]) -> Dag:
         reverse_deps=reverse_deps,
         topo_order=topo_order,
     )
+
+
+def ancestors(dag: Dag, node_ids: Iterable[str]) -> set[str]:
+    """Strict ancestors of ``node_ids`` (every node they transitively depend on)."""
+    return _closure(dag.deps, node_ids)
+
+
+def descendants(dag: Dag, node_ids: Iterable[str]) -> set[str]:
+    """Strict descendants of ``node_ids`` (every node that transitively depends on them)."""
+    return _closure(dag.reverse_deps, node_ids)
+
+
+def _closure(edges: dict[str, list[str]], node_ids: Iterable[str]) -> set[str]:
+    seen: set[str] = set()
+    stack = [nxt for node_id in node_ids for nxt in edges[node_id]]
+    while stack:
+        node_id = stack.pop()
+        if node_id in seen:
+            continue
+        seen.add(node_id)
+        stack.extend(edges[node_id])
+    return seen
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import atexit
 import base64
 import pickle
+import threading
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from types import TracebackType
 from typing import Any
 
 from .cache import CacheBackend
+from .trace import NULL_TRACER, Tracer
 from .types import StageResult, State
 
 
@@ -14,34 +20,181 @@ class DagCacheEntry:
     state: State
     metrics: dict[str, float]
     provenance: dict[str, Any]
+    state_hash: str | None = None
 
 
 class DagCache:
     """Cache wrapper for DAG node results."""
 
+    tracer: Tracer = NULL_TRACER
+
     def __init__(self, backend: CacheBackend):
         self.backend = backend
 
     def get(self, key: str) -> DagCacheEntry | None:
-        payload = self.backend.get(key)
+        with self.tracer.span("cache.read", key=key):
+            payload = self.backend.get(key)
         if payload is None:
             return None
         meta = payload["meta"]
         state_blob = meta.get("state_blob")
         if state_blob is None:
             return None
-        state = pickle.loads(base64.b64decode(state_blob))
+        with self.tracer.span("cache.deserialize", key=key):
+            state = pickle.loads(base64.b64decode(state_blob))
         return DagCacheEntry(
             state=state,
             metrics=meta.get("metrics", {}),
             provenance=meta.get("provenance", {}),
+            state_hash=meta.get("state_hash"),
         )
 
-    def put(self, key: str, result: StageResult[State]) -> None:
-        state_blob = base64.b64encode(pickle.dumps(result.state)).decode()
-        meta = {
+    def get_many(self, keys: Sequence[str]) -> dict[str, DagCacheEntry | None]:
+        return {key: self.get(key) for key in keys}
+
+    def exists(self, key: str) -> bool:
+        return self.backend.exists(key)
+
+    def put(self, key: str, result: StageResult[State], *, state_hash: str | None = None) -> None:
+        self._store(key, self._encode(key, result, state_hash))
+
+    def _encode(
+        self, key: str, result: StageResult[State], state_hash: str | None
+    ) -> dict[str, Any]:
+        with self.tracer.span("cache.serialize", key=key):
+            state_blob = base64.b64encode(pickle.dumps(result.state)).decode()
+        return {
             "state_blob": state_blob,
             "metrics": result.metrics,
             "provenance": result.provenance,
+            "state_hash": state_hash,
         }
-        self.backend.put(key, meta=meta, arrays={})
+
+    def _store(self, key: str, meta: dict[str, Any]) -> None:
+        with self.tracer.span("cache.write", key=key):
+            self.backend.put(key, meta=meta, arrays={})
+
+    def flush(self) -> None:
+        """Block until all accepted writes are stored (no-op for synchronous caches)."""
+
+
+class AsyncDagCache(DagCache):
+    """DagCache with write-behind puts and concurrent lookups.
+
+    ``put`` serializes the entry (a snapshot of the state) and returns; a bounded
+    pool of writer threads stores it in the background. Once the serialized bytes
+    of queued entries exceed ``max_pending_bytes``, ``put`` blocks until writers
+    catch up. Queued entries are served from memory by ``get``; ``get_many``
+    probes the backend from a pool of reader threads.
+
+    ``flush()`` waits for every queued write and re-raises the first write error.
+    ``close()`` (also run at interpreter exit and by ``with``) flushes and stops
+    the pools.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        *,
+        max_writers: int = 2,
+        max_readers: int = 8,
+        max_pending_bytes: int = 1 << 30,
+    ):
+        super().__init__(backend)
+        self._writers = ThreadPoolExecutor(max_writers, thread_name_prefix="dag-cache-writer")
+        self._readers = ThreadPoolExecutor(max_readers, thread_name_prefix="dag-cache-reader")
+        self.max_pending_bytes = max_pending_bytes
+        self._pending: dict[str, tuple[dict[str, Any], int]] = {}
+        self._pending_bytes = 0
+        self._cond = threading.Condition()
+        self._errors: list[BaseException] = []
+        self._closed = False
+        atexit.register(self.close)
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def get(self, key: str) -> DagCacheEntry | None:
+        with self._cond:
+            pending = self._pending.get(key)
+        if pending is None:
+            return super().get(key)
+        meta, _ = pending
+        return DagCacheEntry(
+            state=pickle.loads(base64.b64decode(meta["state_blob"])),
+            metrics=dict(meta["metrics"]),
+            provenance=dict(meta["provenance"]),
+            state_hash=meta["state_hash"],
+        )
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, DagCacheEntry | None]:
+        if len(keys) < 2:
+            return super().get_many(keys)
+        futures = {key: self._readers.submit(self.get, key) for key in keys}
+        return {key: future.result() for key, future in futures.items()}
+
+    def exists(self, key: str) -> bool:
+        with self._cond:
+            if key in self._pending:
+                return True
+        return super().exists(key)
+
+    def put(self, key: str, result: StageResult[State], *, state_hash: str | None = None) -> None:
+        if self._closed:
+            raise RuntimeError("AsyncDagCache is closed.")
+        with self._cond:
+            if key in self._pending:
+                return
+        meta = self._encode(key, result, state_hash)
+        size = len(meta["state_blob"])
+        with self._cond:
+            if key in self._pending:
+                return
+            while self._pending and self._pending_bytes + size > self.max_pending_bytes:
+                self._cond.wait()
+            self._pending[key] = (meta, size)
+            self._pending_bytes += size
+        self._writers.submit(self._write, key)
+
+    def _write(self, key: str) -> None:
+        meta, size = self._pending[key]
+        try:
+            self._store(key, meta)
+        except Exception as exc:
+            self._errors.append(exc)
+        finally:
+            with self._cond:
+                del self._pending[key]
+                self._pending_bytes -= size
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+            errors, self._errors = self._errors, []
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        try:
+            self.flush()
+        finally:
+            self._writers.shutdown(wait=True)
+            self._readers.shutdown(wait=True)
+
+    def __enter__(self) -> AsyncDagCache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
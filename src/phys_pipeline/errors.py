@@ -26,3 +26,9 @@ class SchedulerTimeoutError(SchedulerError): ...
 
 
 class SchedulerRetryError(SchedulerError): ...
+
+
+class SchedulerWorkerCrashError(SchedulerError): ...
+
+
+class StageCancelledError(PipelineError): ...
@@ -1,31 +1,195 @@
 from __future__ import annotations
 
+import functools
+import heapq
+import itertools
+import math
+import random
 import time
-from collections import deque
-from dataclasses import asdict, dataclass, field
-from typing import Any, Protocol
+from collections import Counter, deque
+from collections.abc import (
+    Callable,
+    Collection,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import closing
+from dataclasses import dataclass, field, fields, replace
+from types import TracebackType
+from typing import Any, NamedTuple, Protocol, TypeVar
 
 from .accumulator import RunAccumulator
-from .dag import build_dag
-from .dag_cache import DagCache
-from .errors import SchedulerRetryError, SchedulerTimeoutError
-from .hashing import hash_dag_node, hash_model, hash_policy, hash_state
+from .cancellation import CANCEL_TOKEN_KEY, CancellationToken
+from .dag import Dag, NodesLike, PipelineGraph, as_graph, descendants
+from .dag_cache import DagCache, DagCacheEntry
+from .errors import (
+    MissingPortError,
+    SchedulerRetryError,
+    SchedulerTimeoutError,
+    StageCancelledError,
+    StageContractError,
+)
+from .hashing import hash_dag_node, hash_engine, hash_node_cfg, hash_policy, hash_state
+from .journal import RunJournal
 from .ml_artifacts import ModelArtifactPackager
-from .policy import PolicyLike, as_policy
+from .parallel import merge_results, split_state
+from .policy import PolicyBag, PolicyLike, as_policy
+from .priority import PriorityFn, ReadyQueue, upward_rank
 from .record import ArtifactRecorder
-from .scheduler import LocalScheduler, Scheduler
-from .types import DagState, NodeSpec, StageResult, State
+from .scheduler import JobHandle, LocalScheduler, Scheduler
+from .sweep import LazySweep
+from .sweep_table import SweepTable
+from .trace import NULL_TRACER, TimedValue, Tracer, timed_call
+from .types import (
+    DagState,
+    NodeResources,
+    NodeSpec,
+    PipelineStage,
+    StageResult,
+    State,
+    state_nbytes,
+)
 
 
 class MpiRunner(Protocol):
     def run(self, stage: Any, state: State, *, resources: Any) -> StageResult[State]: ...
 
 
+def _run_stage(
+    node_id: str,
+    stage: PipelineStage[Any, Any] | None,
+    state: State,
+    policy: PolicyBag | None,
+) -> StageResult[State]:
+    # Module-level so process-based schedulers can pickle the submitted call.
+    if stage is None:
+        raise ValueError(f"Node '{node_id}' has no stage attached.")
+    return stage.process(state, policy=policy)
+
+
+def _run_batch(
+    node_id: str,
+    stage: PipelineStage[Any, Any] | None,
+    state: State,
+    cfgs: list[Any],
+    policy: PolicyBag | None,
+) -> list[StageResult[State]]:
+    # One job for a group of sweep variants sharing ``state``; see ``expand_sweep``.
+    if stage is None:
+        raise ValueError(f"Node '{node_id}' has no stage attached.")
+    results = stage.process_batch([state] * len(cfgs), cfgs, policy=policy)
+    if len(results) != len(cfgs):
+        raise StageContractError(
+            f"process_batch for node '{node_id}' returned {len(results)} results "
+            f"for {len(cfgs)} configs."
+        )
+    return results
+
+
+def _node_key(
+    node: NodeSpec,
+    *,
+    cfg_hash: str | None,
+    input_hash: str | None,
+    dep_hashes: dict[str, str],
+    policy_hash: str | None,
+    cache_version: str = "v2",
+) -> str:
+    return hash_dag_node(
+        node_id=node.id,
+        op_name=node.op_name or node.id,
+        version=node.version or "v2",
+        cfg_hash=cfg_hash,
+        input_hash=input_hash,
+        dep_hashes=dep_hashes,
+        policy_hash=policy_hash,
+        cache_version=cache_version,
+    )
+
+
+KEY_MODES = ("content", "recipe")
+ON_ERROR_MODES = ("fail_fast", "keep_going")
+RECIPE_CACHE_VERSION = "v2-recipe"
+
+
+def compute_recipe_keys(
+    dag: Dag | PipelineGraph,
+    initial_hash: str,
+    policy_hash: str | None,
+    cache_version: str = RECIPE_CACHE_VERSION,
+) -> dict[str, str]:
+    """Key every node from the initial-state hash and the graph "recipe" alone.
+
+    A recipe key covers the node's op name, version, cfg hash and policy hash plus
+    the recipe keys of its deps, so the whole DAG can be keyed before anything runs.
+    A ``PipelineGraph`` reuses its cached cfg hashes.
+    """
+    graph = dag if isinstance(dag, PipelineGraph) else None
+    dag = dag.dag if isinstance(dag, PipelineGraph) else dag
+    keys: dict[str, str] = {}
+    for node_id in dag.topo_order:
+        deps = dag.deps[node_id]
+        node = dag.nodes_by_id[node_id]
+        keys[node_id] = _node_key(
+            node,
+            cfg_hash=graph.cfg_hash(node_id) if graph is not None else hash_node_cfg(node),
+            input_hash=None if deps else initial_hash,
+            dep_hashes={dep: keys[dep] for dep in deps},
+            policy_hash=policy_hash,
+            cache_version=cache_version,
+        )
+    return keys
+
+
 @dataclass(slots=True)
 class RetryPolicy:
+    """Retry budget and backoff for failed nodes.
+
+    The delay before retry ``n`` (1-based) is
+    ``min(backoff_s * backoff_factor ** (n - 1), max_backoff_s)`` scaled by a random
+    factor in ``[1 - jitter, 1 + jitter]``. Exceptions in ``non_retryable`` (or for
+    which ``classifier`` returns ``False``) fail immediately. A node can override
+    any field through ``NodeSpec.metadata["retry_policy"]`` (a ``RetryPolicy`` or
+    a dict of field overrides); ``timeout_s`` always comes from the executor.
+    """
+
     max_retries: int = 0
     timeout_s: float | None = None
     backoff_s: float = 0.0
+    backoff_factor: float = 1.0
+    max_backoff_s: float | None = None
+    jitter: float = 0.0
+    non_retryable: tuple[type[BaseException], ...] = (
+        StageContractError,
+        MissingPortError,
+        StageCancelledError,
+    )
+    classifier: Callable[[BaseException], bool] | None = None
+
+    def for_node(self, node: NodeSpec) -> RetryPolicy:
+        override = node.metadata.get("retry_policy")
+        if override is None:
+            return self
+        if isinstance(override, RetryPolicy):
+            return override
+        return replace(self, **override)
+
+    def should_retry(self, exc: BaseException, attempt: int) -> bool:
+        if attempt > self.max_retries or isinstance(exc, self.non_retryable):
+            return False
+        return self.classifier(exc) if self.classifier is not None else True
+
+    def delay_s(self, attempt: int) -> float:
+        delay = self.backoff_s * self.backoff_factor ** (attempt - 1)
+        if self.max_backoff_s is not None:
+            delay = min(delay, self.max_backoff_s)
+        if self.jitter:
+            delay *= 1.0 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
 
 
 @dataclass(slots=True)
@@ -36,6 +200,66 @@ class NodeProvenance:
     attempts: int
     cache_hit: bool = False
     error: str | None = None
+    seeded: bool = False
+
+
+_PROVENANCE_FIELDS = tuple(f.name for f in fields(NodeProvenance))
+
+
+@dataclass(slots=True)
+class DagPlan:
+    """Recipe-keyed execution plan: each node is a cache ``hit``, a ``run``, or a ``skip``."""
+
+    keys: dict[str, str]
+    status: dict[str, str]
+
+    def _with_status(self, status: str) -> list[str]:
+        return [node_id for node_id, value in self.status.items() if value == status]
+
+    @property
+    def hits(self) -> list[str]:
+        return self._with_status("hit")
+
+    @property
+    def runs(self) -> list[str]:
+        return self._with_status("run")
+
+    @property
+    def skipped(self) -> list[str]:
+        return self._with_status("skip")
+
+
+class NodeEvent(NamedTuple):
+    """One node completion (or cache hit) streamed by ``DagExecutor.run_iter``."""
+
+    node_id: str
+    result: StageResult[State]
+    provenance: NodeProvenance
+
+
+class SweepEvent(NamedTuple):
+    """One finished variant streamed by ``DagExecutor.run_sweep``."""
+
+    variant: int
+    result: StageResult[State]
+    provenance: NodeProvenance
+
+
+@dataclass
+class HalvingResult:
+    """Outcome of ``DagExecutor.run_halving``/``run_hyperband``."""
+
+    best: int
+    params: dict[str, Any]
+    score: float
+    # Scores of the surviving variants at each rung, in the order they ran.
+    rungs: list[dict[int, float]] = field(default_factory=list)
+    # Variant nodes actually executed (cache hits excluded).
+    executions: int = 0
+
+
+_Y = TypeVar("_Y")
+_R = TypeVar("_R")
 
 
 @dataclass
@@ -45,10 +269,51 @@ class DagRunResult:
     artifacts: dict[str, Any]
     provenance: dict[str, Any]
     execution_order: list[str] = field(default_factory=list)
+    # Populated only with ``on_error="keep_going"``: failed node -> error message,
+    # and the nodes that were not run because an upstream node failed.
+    failures: dict[str, str] = field(default_factory=dict)
+    blocked: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+
+# (cpu, gpu, memory_gb) of a resource request.
+_Shape = tuple[int, int, float]
+
+
+def _shape(resources: NodeResources) -> _Shape:
+    return (resources.cpu, resources.gpu, resources.memory_gb or 0.0)
+
+
+def _fits(shape: _Shape, capacity: NodeResources) -> bool:
+    cpu, gpu, memory_gb = shape
+    return (
+        cpu <= capacity.cpu
+        and gpu <= capacity.gpu
+        and (capacity.memory_gb is None or memory_gb <= capacity.memory_gb)
+    )
+
+
+def _slots(resources: NodeResources, capacity: NodeResources) -> int:
+    # How many copies of ``resources`` fit in ``capacity`` right now.
+    counts = [capacity.cpu // max(resources.cpu, 1)]
+    if resources.gpu:
+        counts.append(capacity.gpu // resources.gpu)
+    if resources.memory_gb and capacity.memory_gb is not None:
+        counts.append(int(capacity.memory_gb // resources.memory_gb))
+    return min(counts)
 
 
 class DagExecutor:
-    """Execute DAG nodes with optional scheduling, caching, and retries."""
+    """Execute DAG nodes with optional scheduling, caching, and retries.
+
+    Each run shuts the scheduler down when it ends, unless the executor is used as
+    a context manager: inside ``with DagExecutor(...) as executor:`` the
+    scheduler's pool (and any worker processes, with their imported modules and
+    caches) stays warm across runs and is shut down when the block exits.
+    """
 
     def __init__(
         self,
@@ -59,30 +324,679 @@ class DagExecutor:
         policy: PolicyLike | None = None,
         mpi_runner: MpiRunner | None = None,
         model_packager: ModelArtifactPackager | None = None,
+        key_mode: str = "content",
+        priority: PriorityFn | None = upward_rank,
+        tracer: Tracer | None = None,
+        backfill_limit: int = 8,
+        on_error: str = "fail_fast",
+        max_chunks: int | None = None,
+        cache_version: str = "v2",
     ):
+        if key_mode not in KEY_MODES:
+            raise ValueError(f"Unsupported key_mode: {key_mode}")
+        if on_error not in ON_ERROR_MODES:
+            raise ValueError(f"Unsupported on_error: {on_error}")
+        # The cache version picks the array hashing engine (see ``HASH_ENGINES``).
+        self.hash_engine = hash_engine(cache_version)
+        self.cache_version = cache_version
         self.scheduler = scheduler or LocalScheduler(max_workers=1, max_cpu=1, max_gpu=0)
         self.cache = cache
+        self.key_mode = key_mode
+        self.priority = priority
+        self.backfill_limit = backfill_limit
+        self.on_error = on_error
+        self.max_chunks = max_chunks
         self.retry_policy = retry_policy or RetryPolicy()
         self.policy = as_policy(policy)
         self.mpi_runner = mpi_runner
         self.model_packager = model_packager
+        self.tracer = tracer or NULL_TRACER
+        self._warm = False
+
+    def __enter__(self) -> DagExecutor:
+        """Keep the scheduler's pool alive across runs until the block exits."""
+        self._warm = True
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close(wait=exc_type is None)
+
+    def close(self, *, wait: bool = True) -> None:
+        """Shut the scheduler down; the executor cannot run anything afterwards."""
+        self._warm = False
+        self.scheduler.shutdown(wait=wait)
+
+    def _end_run(self, completed: bool) -> None:
+        # Outside a ``with`` block each run owns the scheduler and shuts it down.
+        if not self._warm:
+            self.scheduler.shutdown(wait=completed)
 
     def set_policy(self, policy: PolicyLike | None) -> None:
         self.policy = as_policy(policy)
 
+    def _recipe_keys(
+        self, graph: PipelineGraph, initial_state: State, policy_hash: str | None
+    ) -> dict[str, str]:
+        initial_hash = hash_state(initial_state, self.hash_engine)
+        return compute_recipe_keys(
+            graph, initial_hash, policy_hash, cache_version=f"{self.cache_version}-recipe"
+        )
+
+    @staticmethod
+    def _outputs(
+        dag: Dag, targets: Collection[str] | None, stop_at: Collection[str] | None
+    ) -> set[str]:
+        # Requested outputs: ``targets`` (sinks by default), never past ``stop_at``.
+        requested = [*(targets or []), *(stop_at or [])]
+        unknown = set(requested) - dag.nodes_by_id.keys()
+        if unknown:
+            raise ValueError(f"Unknown node ids in targets/stop_at: {sorted(unknown)}")
+        excluded = descendants(dag, stop_at) if stop_at else set()
+        if targets is not None:
+            if not targets:
+                raise ValueError("targets must name at least one node.")
+            cut = excluded.intersection(targets)
+            if cut:
+                raise ValueError(f"Targets are downstream of stop_at nodes: {sorted(cut)}")
+            return set(targets)
+        return {
+            node_id
+            for node_id in dag.topo_order
+            if node_id not in excluded and all(dep in excluded for dep in dag.reverse_deps[node_id])
+        }
+
+    @staticmethod
+    def _resolve(
+        dag: Dag, probe: Callable[[list[str]], set[str]], outputs: set[str]
+    ) -> dict[str, str]:
+        # Walk from the requested outputs upward; a hit satisfies its ancestor closure.
+        # Nodes whose dependents are all decided form a wave and are probed as a batch.
+        needed = set(outputs)
+        status: dict[str, str] = {}
+        undecided = {node_id: len(dag.reverse_deps[node_id]) for node_id in dag.topo_order}
+        wave = [node_id for node_id, count in undecided.items() if count == 0]
+        while wave:
+            hits = probe([node_id for node_id in wave if node_id in needed])
+            for node_id in wave:
+                if node_id not in needed:
+                    status[node_id] = "skip"
+                elif node_id in hits:
+                    status[node_id] = "hit"
+                else:
+                    status[node_id] = "run"
+                    needed.update(dag.deps[node_id])
+            next_wave = []
+            for node_id in wave:
+                for dep in dag.deps[node_id]:
+                    undecided[dep] -= 1
+                    if undecided[dep] == 0:
+                        next_wave.append(dep)
+            wave = next_wave
+        return {node_id: status[node_id] for node_id in dag.topo_order}
+
+    def plan(
+        self,
+        initial_state: State,
+        nodes: NodesLike,
+        *,
+        policy: PolicyLike | None = None,
+        targets: Collection[str] | None = None,
+        stop_at: Collection[str] | None = None,
+    ) -> DagPlan:
+        """Dry run with recipe keys: probe the cache without loading or executing nodes."""
+        run_policy = as_policy(policy) if policy is not None else self.policy
+        policy_hash = hash_policy(run_policy) if run_policy is not None else None
+        graph = as_graph(nodes)
+        dag = graph.dag
+        keys = self._recipe_keys(graph, initial_state, policy_hash)
+        outputs = self._outputs(dag, targets, stop_at)
+        cache = self.cache
+        if cache is None:
+            status = self._resolve(dag, lambda node_ids: set(), outputs)
+        else:
+            status = self._resolve(
+                dag,
+                lambda node_ids: {node_id for node_id in node_ids if cache.exists(keys[node_id])},
+                outputs,
+            )
+        return DagPlan(keys=keys, status=status)
+
     def run(
         self,
         initial_state: State,
-        nodes: list[NodeSpec],
+        nodes: NodesLike,
         *,
         record_artifacts: bool = False,
         recorder: ArtifactRecorder | None = None,
         policy: PolicyLike | None = None,
+        release_intermediates: bool = False,
+        keep: Collection[str] | None = None,
+        seed: Mapping[str, StageResult[State]] | None = None,
+        targets: Collection[str] | None = None,
+        stop_at: Collection[str] | None = None,
+        start_from: Mapping[str, State | StageResult[State]] | Collection[str] | None = None,
+        journal: RunJournal | None = None,
+    ) -> DagRunResult:
+        """Execute ``nodes`` starting from ``initial_state``; see ``run_iter`` for options."""
+        events = self.run_iter(
+            initial_state,
+            nodes,
+            record_artifacts=record_artifacts,
+            recorder=recorder,
+            policy=policy,
+            release_intermediates=release_intermediates,
+            keep=keep,
+            seed=seed,
+            targets=targets,
+            stop_at=stop_at,
+            start_from=start_from,
+            journal=journal,
+        )
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    def resume(
+        self,
+        journal: RunJournal,
+        initial_state: State,
+        nodes: NodesLike,
+        *,
+        policy: PolicyLike | None = None,
+        targets: Collection[str] | None = None,
+        stop_at: Collection[str] | None = None,
+        seed: Mapping[str, StageResult[State]] | None = None,
+        **options: Any,
     ) -> DagRunResult:
+        """Continue an interrupted ``run`` from ``journal`` without redoing finished nodes.
+
+        Journal records are matched by recipe key, so nodes whose config, ancestors,
+        initial state or policy changed since the journal was written run again. Only
+        finished nodes on the frontier (needed by an unfinished node or requested as
+        an output) are loaded; the remaining options are passed on to ``run``.
+        """
         run_policy = as_policy(policy) if policy is not None else self.policy
         policy_hash = hash_policy(run_policy) if run_policy is not None else None
-        dag = build_dag(nodes)
+        graph = as_graph(nodes)
+        dag = graph.dag
+        keys = self._recipe_keys(graph, initial_state, policy_hash)
+        done = {
+            node_id: record
+            for node_id, record in journal.completed().items()
+            if keys.get(node_id) == record["key"]
+        }
+        outputs = self._outputs(dag, targets, stop_at)
+        seeds: dict[str, StageResult[State]] = {}
+        for node_id, record in done.items():
+            frontier = node_id in outputs or any(
+                dependent not in done for dependent in dag.reverse_deps[node_id]
+            )
+            if not frontier:
+                continue
+            result = journal.load(record, cache=self.cache)
+            if result is not None:
+                seeds[node_id] = result
+        seeds.update(seed or {})
+        return self.run(
+            initial_state,
+            graph,
+            policy=policy,
+            targets=targets,
+            stop_at=stop_at,
+            seed=seeds,
+            journal=journal,
+            **options,
+        )
+
+    def run_iter(
+        self,
+        initial_state: State,
+        nodes: NodesLike,
+        *,
+        record_artifacts: bool = False,
+        recorder: ArtifactRecorder | None = None,
+        policy: PolicyLike | None = None,
+        release_intermediates: bool = False,
+        keep: Collection[str] | None = None,
+        seed: Mapping[str, StageResult[State]] | None = None,
+        targets: Collection[str] | None = None,
+        stop_at: Collection[str] | None = None,
+        start_from: Mapping[str, State | StageResult[State]] | Collection[str] | None = None,
+        journal: RunJournal | None = None,
+    ) -> Generator[NodeEvent, None, DagRunResult]:
+        """Execute ``nodes`` and yield a ``NodeEvent`` as each node completes.
+
+        Cache hits and seeded nodes are yielded as soon as they are resolved. The
+        generator's return value (``StopIteration.value``, or the result of
+        ``yield from``) is the same ``DagRunResult`` that ``run`` returns; pass
+        ``keep=()`` to stream results without retaining them.
+
+        With ``release_intermediates=True`` (implied by passing ``keep``), a node's
+        result is dropped as soon as every dependent has consumed it; only the
+        ``keep`` nodes (sinks by default) are returned in ``DagRunResult.results``.
+
+        ``seed`` supplies ready-made results for some nodes: they are not executed,
+        and their ancestors are skipped unless another needed node depends on them.
+
+        Partial execution:
+            - ``targets``: run only the ancestor closure of these nodes.
+            - ``stop_at``: include these nodes but none of their descendants.
+            - ``start_from``: seed nodes from supplied states/results, or, for bare
+              node ids, from their cache entries (requires ``key_mode="recipe"``).
+
+        ``journal`` appends each completed node to a ``RunJournal`` so an interrupted
+        run can continue with ``resume``.
+        """
+        events = self._run_iter(
+            initial_state,
+            nodes,
+            record_artifacts=record_artifacts,
+            recorder=recorder,
+            policy=policy,
+            release_intermediates=release_intermediates,
+            keep=keep,
+            seed=seed,
+            targets=targets,
+            stop_at=stop_at,
+            start_from=start_from,
+            journal=journal,
+        )
+        return (yield from self._traced(events))
+
+    def run_sweep(
+        self,
+        initial_state: State,
+        sweep: LazySweep,
+        *,
+        window: int = 1024,
+        policy: PolicyLike | None = None,
+        variants: Sequence[int] | None = None,
+        table: SweepTable | None = None,
+    ) -> Iterator[SweepEvent]:
+        """Run every variant of ``sweep`` and yield a ``SweepEvent`` as each finishes.
+
+        The upstream nodes run once; variants are then built and run ``window`` at a
+        time with the upstream results seeded, and are not retained once yielded, so
+        memory stays flat however large the grid is. Use ``sweep.decode(event.variant)``
+        for a variant's parameters, and ``variants`` (e.g. from ``sweep.sample``) to
+        run a subset. Pass a ``SweepTable`` as ``table`` to collect each variant's
+        parameters and metrics into columns as it finishes.
+        """
+        return self._traced(
+            self._sweep_events(initial_state, sweep, window, policy, variants=variants, table=table)
+        )
+
+    def run_halving(
+        self,
+        initial_state: State,
+        sweep: LazySweep,
+        *,
+        metric: str,
+        fidelity: str,
+        budgets: Sequence[Any],
+        eta: int = 3,
+        mode: str = "min",
+        threshold: float | None = None,
+        variants: Sequence[int] | None = None,
+        window: int = 1024,
+        policy: PolicyLike | None = None,
+    ) -> HalvingResult:
+        """Find the best variant of ``sweep`` by successive halving over a fidelity.
+
+        Rung ``r`` runs the surviving variants with ``cfg.<fidelity> = budgets[r]``
+        and keeps the best ``1/eta`` of them by ``StageResult.metrics[metric]``
+        (lower is better unless ``mode="max"``). Variants scoring worse than
+        ``threshold`` are stopped at whichever rung they cross it. ``variants``
+        restricts the starting set (all grid points by default).
+        """
+        sign = self._halving_sign(mode, eta)
+        candidates = list(range(len(sweep)) if variants is None else variants)
+        events = self._halving_events(
+            initial_state,
+            sweep,
+            candidates,
+            budgets,
+            metric,
+            fidelity,
+            eta,
+            sign,
+            threshold,
+            window,
+            policy,
+        )
+        completed = False
+        try:
+            rungs, executions = self._drain(self._traced(events))
+            completed = True
+        finally:
+            self._end_run(completed)
+        final = rungs[-1] if len(rungs) == len(budgets) else {}
+        return self._halving_result(sweep, final, rungs, executions, sign)
+
+    def run_hyperband(
+        self,
+        initial_state: State,
+        sweep: LazySweep,
+        *,
+        metric: str,
+        fidelity: str,
+        budgets: Sequence[Any],
+        eta: int = 3,
+        mode: str = "min",
+        threshold: float | None = None,
+        method: str = "random",
+        seed: int = 0,
+        window: int = 1024,
+        policy: PolicyLike | None = None,
+    ) -> HalvingResult:
+        """Hyperband: successive-halving brackets that start at each budget in turn.
+
+        Bracket ``s`` samples ``ceil(len(budgets) / (s + 1) * eta**s)`` variants with
+        ``sweep.sample(method=method)`` and halves them over the last ``s + 1``
+        budgets, trading many cheap evaluations against few thorough ones. The best
+        variant is chosen among those that reached the final budget.
+        """
+        sign = self._halving_sign(mode, eta)
+        top = len(budgets) - 1
+        rungs: list[dict[int, float]] = []
+        final: dict[int, float] = {}
+        executions = 0
+        completed = False
+        try:
+            for s in range(top, -1, -1):
+                n = math.ceil((top + 1) / (s + 1) * eta**s)
+                candidates = sweep.sample(n, method=method, seed=seed + s)
+                events = self._halving_events(
+                    initial_state,
+                    sweep,
+                    candidates,
+                    budgets[top - s :],
+                    metric,
+                    fidelity,
+                    eta,
+                    sign,
+                    threshold,
+                    window,
+                    policy,
+                )
+                bracket, count = self._drain(self._traced(events))
+                executions += count
+                rungs.extend(bracket)
+                if len(bracket) == s + 1:
+                    # Only scores at the final budget are compared across brackets.
+                    final.update(bracket[-1])
+            completed = True
+        finally:
+            self._end_run(completed)
+        return self._halving_result(sweep, final, rungs, executions, sign)
+
+    @staticmethod
+    def _halving_sign(mode: str, eta: int) -> float:
+        if mode not in ("min", "max"):
+            raise ValueError(f"Unsupported mode: {mode}")
+        if eta < 2:
+            raise ValueError("eta must be at least 2.")
+        return 1.0 if mode == "min" else -1.0
+
+    @staticmethod
+    def _drain(events: Generator[Any, None, _R]) -> _R:
+        while True:
+            try:
+                next(events)
+            except StopIteration as stop:
+                return stop.value
+
+    def _halving_events(
+        self,
+        initial_state: State,
+        sweep: LazySweep,
+        candidates: list[int],
+        budgets: Sequence[Any],
+        metric: str,
+        fidelity: str,
+        eta: int,
+        sign: float,
+        threshold: float | None,
+        window: int,
+        policy: PolicyLike | None,
+    ) -> Generator[SweepEvent, None, tuple[list[dict[int, float]], int]]:
+        rungs: list[dict[int, float]] = []
+        executions = 0
+        for rung, budget in enumerate(budgets):
+            scores: dict[int, float] = {}
+            events = self._sweep_events(
+                initial_state,
+                sweep.with_overrides(**{fidelity: budget}),
+                window,
+                policy,
+                variants=sorted(candidates),
+                shutdown=False,
+            )
+            for event in events:
+                yield event
+                executions += 0 if event.provenance.cache_hit else 1
+                if metric not in event.result.metrics:
+                    raise ValueError(f"Variant {event.variant} reported no metric '{metric}'.")
+                score = float(event.result.metrics[metric])
+                # Early stop: drop variants past the threshold at any rung.
+                if threshold is not None and sign * score > sign * threshold:
+                    continue
+                scores[event.variant] = score
+            rungs.append(scores)
+            ranked = sorted(scores, key=lambda index: sign * scores[index])
+            candidates = ranked[: max(1, len(ranked) // eta)]
+            if not candidates:
+                break
+        return rungs, executions
+
+    @staticmethod
+    def _halving_result(
+        sweep: LazySweep,
+        scores: dict[int, float],
+        rungs: list[dict[int, float]],
+        executions: int,
+        sign: float,
+    ) -> HalvingResult:
+        if not scores:
+            raise ValueError("Every variant was stopped early; no best configuration.")
+        best = min(scores, key=lambda index: sign * scores[index])
+        return HalvingResult(
+            best=best,
+            params=sweep.decode(best),
+            score=scores[best],
+            rungs=rungs,
+            executions=executions,
+        )
+
+    def _sweep_events(
+        self,
+        initial_state: State,
+        sweep: LazySweep,
+        window: int,
+        policy: PolicyLike | None,
+        *,
+        variants: Sequence[int] | None = None,
+        shutdown: bool = True,
+        table: SweepTable | None = None,
+    ) -> Generator[SweepEvent, None, None]:
+        deps = list(sweep.base.deps)
+        by_id = {node.id: node for node in sweep.upstream}
+        completed = False
+        try:
+            seed: dict[str, StageResult[State]] = {}
+            if deps:
+                upstream = self._run_iter(
+                    initial_state,
+                    sweep.upstream,
+                    policy=policy,
+                    targets=deps,
+                    keep=deps,
+                    shutdown=False,
+                )
+                with closing(upstream):
+                    while True:
+                        try:
+                            next(upstream)
+                        except StopIteration as stop:
+                            seed = {dep: stop.value.results[dep] for dep in deps}
+                            break
+            for nodes in sweep.windows(window, variants):
+                events = self._run_iter(
+                    initial_state,
+                    [by_id[dep] for dep in deps] + nodes,
+                    policy=policy,
+                    seed=seed,
+                    keep=(),
+                    shutdown=False,
+                )
+                with closing(events):
+                    for event in events:
+                        if event.node_id in seed:
+                            continue
+                        variant = sweep.index_of(event.node_id)
+                        if table is not None:
+                            table.append_result(variant, sweep.decode(variant), event.result)
+                        yield SweepEvent(variant, event.result, event.provenance)
+            completed = True
+        finally:
+            if shutdown:
+                self._end_run(completed)
+
+    def run_many(
+        self,
+        states: Iterable[State],
+        nodes: NodesLike,
+        *,
+        max_concurrent: int | None = None,
+        **options: Any,
+    ) -> list[DagRunResult]:
+        """Run ``nodes`` once per initial state; results are in ``states`` order.
+
+        See ``run_many_iter``; ``options`` are the keyword arguments of ``run``.
+        """
+        results = dict(self.run_many_iter(states, nodes, max_concurrent=max_concurrent, **options))
+        return [results[index] for index in range(len(results))]
+
+    def run_many_iter(
+        self,
+        states: Iterable[State],
+        nodes: NodesLike,
+        *,
+        max_concurrent: int | None = None,
+        **options: Any,
+    ) -> Iterator[tuple[int, DagRunResult]]:
+        """Run an ensemble and yield ``(member index, DagRunResult)`` as members finish.
+
+        The DAG and its priorities are built once and every member shares the warm
+        scheduler, which is shut down only after the last member (or kept, inside a
+        ``with`` block). Up to ``max_concurrent`` members (twice the scheduler's free
+        CPUs by default) are coordinated at once, so nodes of different members
+        interleave on the pool and keep its workers busy. The first failing member
+        stops the ensemble.
+        """
+        return self._traced(self._many_events(states, nodes, max_concurrent, options))
+
+    def _many_events(
+        self,
+        states: Iterable[State],
+        nodes: NodesLike,
+        max_concurrent: int | None,
+        options: dict[str, Any],
+    ) -> Generator[tuple[int, DagRunResult], None, None]:
+        graph = as_graph(nodes)
+        if max_concurrent is None:
+            capacity = self.scheduler.capacity()
+            max_concurrent = 2 * capacity.cpu if capacity is not None and capacity.cpu else 4
+        members = iter(enumerate(states))
+
+        def run_member(state: State) -> DagRunResult:
+            events = self._run_iter(state, graph, shutdown=False, **options)
+            return self._drain(events)
+
+        completed = False
+        pool = ThreadPoolExecutor(max_workers=max_concurrent)
+        try:
+            pending: dict[Future[DagRunResult], int] = {}
+
+            def top_up() -> None:
+                # Admit members lazily so a huge ensemble is never materialised at once.
+                for index, state in itertools.islice(members, max_concurrent - len(pending)):
+                    pending[pool.submit(run_member, state)] = index
+
+            top_up()
+            while pending:
+                done, _ = wait(pending, return_when="FIRST_COMPLETED")
+                for future in done:
+                    index = pending.pop(future)
+                    yield index, future.result()
+                top_up()
+            completed = True
+        finally:
+            pool.shutdown(wait=completed, cancel_futures=True)
+            self._end_run(completed)
+
+    def _traced(self, events: Generator[_Y, None, _R]) -> Generator[_Y, None, _R]:
+        tracer = self.tracer
+        if not tracer.enabled:
+            return (yield from events)
+        # Trace the scheduler and cache only for the duration of this run, so objects
+        # shared with other executors are left as they were.
+        cache = self.cache
+        saved = self.scheduler.tracer, cache.tracer if cache is not None else NULL_TRACER
+        self.scheduler.tracer = tracer
+        if cache is not None:
+            cache.tracer = tracer
+        try:
+            return (yield from events)
+        finally:
+            self.scheduler.tracer = saved[0]
+            if cache is not None:
+                cache.tracer = saved[1]
+
+    def _run_iter(
+        self,
+        initial_state: State,
+        nodes: NodesLike,
+        *,
+        record_artifacts: bool = False,
+        recorder: ArtifactRecorder | None = None,
+        policy: PolicyLike | None = None,
+        release_intermediates: bool = False,
+        keep: Collection[str] | None = None,
+        seed: Mapping[str, StageResult[State]] | None = None,
+        targets: Collection[str] | None = None,
+        stop_at: Collection[str] | None = None,
+        start_from: Mapping[str, State | StageResult[State]] | Collection[str] | None = None,
+        journal: RunJournal | None = None,
+        shutdown: bool = True,
+    ) -> Generator[NodeEvent, None, DagRunResult]:
+        run_policy = as_policy(policy) if policy is not None else self.policy
+        policy_hash = hash_policy(run_policy) if run_policy is not None else None
+        graph = as_graph(nodes)
+        dag = graph.dag
+        priorities = graph.priorities(self.priority) if self.priority is not None else {}
+        # Stages see the run's cancellation token in their policy; it is not hashed.
+        token = CancellationToken()
+        stage_policy = PolicyBag({**(run_policy or {}), CANCEL_TOKEN_KEY: token})
+        tracer = self.tracer
+        tracing = tracer.enabled
         results: dict[str, StageResult[State]] = {}
+        partial = targets is not None or stop_at is not None
+        outputs = self._outputs(dag, targets, stop_at)
+        release = release_intermediates or keep is not None
+        if keep is None:
+            keep = outputs
+        unknown = set(keep) - dag.nodes_by_id.keys()
+        if unknown:
+            raise ValueError(f"Unknown node ids in keep: {sorted(unknown)}")
+        keep_ids = set(keep)
         provenance_records: list[NodeProvenance] = []
 
         acc = RunAccumulator(
@@ -93,11 +1007,172 @@ class DagExecutor:
         if policy_hash is not None:
             acc.provenance["policy_hash"] = policy_hash
 
-        in_degree = {node_id: len(deps) for node_id, deps in dag.deps.items()}
-        ready = deque([node_id for node_id, degree in in_degree.items() if degree == 0])
+        seeds = dict(seed or {})
+        start_ids: Collection[str] = start_from or ()
+        if isinstance(start_from, Mapping):
+            for node_id, value in start_from.items():
+                seeds[node_id] = value if isinstance(value, StageResult) else StageResult(value)
+            start_ids = ()
+        unknown = (seeds.keys() | set(start_ids)) - dag.nodes_by_id.keys()
+        if unknown:
+            raise ValueError(f"Unknown node ids in seed/start_from: {sorted(unknown)}")
+        recipe_keys: dict[str, str] = {}
+        preloaded: dict[str, DagCacheEntry] = {}
+        status = dict.fromkeys(dag.nodes_by_id, "run")
+        cache = self.cache
+        if self.key_mode == "recipe" and cache is not None:
+            recipe_keys = self._recipe_keys(graph, initial_state, policy_hash)
+        journal_keys = recipe_keys
+        if journal is not None and not journal_keys:
+            journal_keys = self._recipe_keys(graph, initial_state, policy_hash)
+        for node_id in start_ids:
+            if not recipe_keys or cache is None:
+                raise ValueError("start_from node ids require a cache with key_mode='recipe'.")
+            entry = cache.get(recipe_keys[node_id])
+            if entry is None:
+                raise ValueError(f"No cache entry for start_from node '{node_id}'.")
+            seeds[node_id] = StageResult(
+                state=entry.state, metrics=entry.metrics, provenance=entry.provenance
+            )
+        planned = bool(seeds or recipe_keys or partial)
+        if planned:
+
+            def probe(node_ids: list[str]) -> set[str]:
+                hits = {node_id for node_id in node_ids if node_id in seeds}
+                lookup = [node_id for node_id in node_ids if node_id not in hits]
+                if not recipe_keys or cache is None or not lookup:
+                    return hits
+                entries = cache.get_many([recipe_keys[node_id] for node_id in lookup])
+                for node_id in lookup:
+                    entry = entries.get(recipe_keys[node_id])
+                    if entry is not None:
+                        preloaded[node_id] = entry
+                        hits.add(node_id)
+                return hits
+
+            status = self._resolve(dag, probe, outputs)
+            acc.provenance["cache_plan"] = {
+                value: sum(1 for v in status.values() if v == value)
+                for value in ("hit", "run", "skip")
+            }
+
+        if planned:
+            in_degree = {
+                node_id: len(deps) if status[node_id] == "run" else 0
+                for node_id, deps in dag.deps.items()
+                if status[node_id] != "skip"
+            }
+        else:
+            # Every node runs: the graph's precomputed degree vectors seed the counters.
+            in_degree = dict(zip(graph.ids, graph.in_degree.tolist(), strict=True))
+        # Roots enter the queue in node-list order (ties are dispatched FIFO).
+        ready = ReadyQueue(
+            priorities, [node_id for node_id in dag.nodes_by_id if in_degree.get(node_id) == 0]
+        )
         running: dict[str, Any] = {}
-        attempts: dict[str, int] = {node_id: 0 for node_id in dag.nodes_by_id}
+        attempts = dict.fromkeys(dag.nodes_by_id, 0)
         execution_order: list[str] = []
+        emitted: deque[NodeEvent] = deque()
+        # perf_counter_ns timestamps for the queue_wait/pool_wait trace spans.
+        ready_at: dict[str, int] = {}
+        if tracing:
+            ready_at = dict.fromkeys(in_degree, time.perf_counter_ns())
+
+        # Reference counts: how many runnable dependents still need each output.
+        if planned:
+            consumers = {
+                node_id: sum(1 for dep in dag.reverse_deps[node_id] if status[dep] == "run")
+                for node_id in dag.nodes_by_id
+            }
+        else:
+            consumers = dict(zip(graph.ids, graph.out_degree.tolist(), strict=True))
+        retained_sizes: dict[str, int] = {}
+        # Recipe-mode hits are loaded while planning and held until their node is reached.
+        preloaded_sizes = (
+            {node_id: state_nbytes(entry.state) for node_id, entry in preloaded.items()}
+            if release
+            else {}
+        )
+        retained_bytes = sum(preloaded_sizes.values())
+        peak_retained_bytes = retained_bytes
+
+        def maybe_release(node_id: str) -> None:
+            nonlocal retained_bytes
+            if consumers[node_id] or node_id in keep_ids or node_id not in results:
+                return
+            del results[node_id]
+            retained_bytes -= retained_sizes.pop(node_id)
+
+        def store_result(node_id: str, result: StageResult[State]) -> None:
+            nonlocal retained_bytes, peak_retained_bytes
+            results[node_id] = result
+            if not release:
+                return
+            retained_sizes[node_id] = state_nbytes(result.state)
+            retained_bytes += retained_sizes[node_id]
+            peak_retained_bytes = max(peak_retained_bytes, retained_bytes)
+
+        def advance(node_id: str) -> None:
+            for dependent in dag.reverse_deps[node_id]:
+                if status[dependent] != "run":
+                    continue
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.push(dependent)
+                    if tracing:
+                        ready_at[dependent] = time.perf_counter_ns()
+            if release:
+                maybe_release(node_id)
+
+        def reuse(
+            node_id: str,
+            result: StageResult[State],
+            *,
+            cache_hit: bool = False,
+            seeded: bool = False,
+        ) -> None:
+            now = time.time()
+            acc.consume(node_id, result)
+            store_result(node_id, result)
+            consume_inputs(node_id)
+            record = NodeProvenance(
+                node_id=node_id,
+                started_at=now,
+                finished_at=now,
+                attempts=attempts[node_id],
+                cache_hit=cache_hit,
+                seeded=seeded,
+            )
+            provenance_records.append(record)
+            emitted.append(NodeEvent(node_id, result, record))
+            execution_order.append(node_id)
+            advance(node_id)
+
+        failures: dict[str, str] = {}
+        blocked: list[str] = []
+
+        def block_dependents(node_id: str) -> None:
+            # keep_going: nodes downstream of a failure never run; drop their claims
+            # on other inputs so those can still be released.
+            stack = [node_id]
+            while stack:
+                for dependent in dag.reverse_deps[stack.pop()]:
+                    if status[dependent] != "run":
+                        continue
+                    status[dependent] = "blocked"
+                    blocked.append(dependent)
+                    stack.append(dependent)
+                    if release:
+                        for dep in dag.deps[dependent]:
+                            consumers[dep] -= 1
+                            maybe_release(dep)
+
+        def consume_inputs(node_id: str) -> None:
+            if not release or status[node_id] != "run":
+                return
+            for dep in dag.deps[node_id]:
+                consumers[dep] -= 1
+                maybe_release(dep)
 
         def build_input_state(node_id: str) -> State:
             deps = dag.deps[node_id]
@@ -107,171 +1182,428 @@ class DagExecutor:
                 return results[deps[0]].state
             return DagState({dep: results[dep].state for dep in deps})
 
-        def compute_cache_key(node: NodeSpec, input_state: State) -> str:
-            dep_hashes = {dep: hash_state(results[dep].state) for dep in dag.deps[node.id]}
-            cfg_hash = None
-            stage = node.stage
-            if stage is not None and getattr(stage, "cfg", None) is not None:
-                try:
-                    cfg_hash = hash_model(stage.cfg)
-                except Exception:
-                    cfg_hash = None
-            return hash_dag_node(
-                node_id=node.id,
-                op_name=node.op_name or node.id,
-                version=node.version or "v2",
-                cfg_hash=cfg_hash,
-                input_hash=hash_state(input_state),
+        # Each output is hashed at most once per run; keys compose these digests.
+        state_hashes: dict[str, str] = {}
+        initial_hash: str | None = None
+
+        def output_hash(node_id: str) -> str:
+            digest = state_hashes.get(node_id)
+            if digest is None:
+                with tracer.span("hash_state", node_id=node_id):
+                    digest = hash_state(results[node_id].state, self.hash_engine)
+                state_hashes[node_id] = digest
+            return digest
+
+        def compute_cache_key(node: NodeSpec) -> str:
+            nonlocal initial_hash
+            deps = dag.deps[node.id]
+            input_hash = None
+            if not deps:
+                if initial_hash is None:
+                    with tracer.span("hash_state"):
+                        initial_hash = hash_state(initial_state, self.hash_engine)
+                input_hash = initial_hash
+            dep_hashes = {dep: output_hash(dep) for dep in deps}
+            return _node_key(
+                node,
+                cfg_hash=graph.cfg_hash(node.id),
+                input_hash=input_hash,
                 dep_hashes=dep_hashes,
                 policy_hash=policy_hash,
+                cache_version=self.cache_version,
             )
 
-        def run_node(node: NodeSpec, input_state: State) -> StageResult[State]:
-            if node.stage is None:
-                raise ValueError(f"Node '{node.id}' has no stage attached.")
-            if node.resources.mpi_ranks > 1 and self.mpi_runner is not None:
-                return self.mpi_runner.run(node.stage, input_state, resources=node.resources)
-            return node.stage.process(input_state, policy=run_policy)
-
-        while ready or running:
-            while ready:
-                node_id = ready.popleft()
-                node = dag.nodes_by_id[node_id]
-                input_state = build_input_state(node_id)
-                cache_key = compute_cache_key(node, input_state)
-                if self.cache is not None:
-                    cached = self.cache.get(cache_key)
-                    if cached is not None:
-                        result = StageResult(
-                            state=cached.state,
-                            metrics=cached.metrics,
-                            provenance=cached.provenance,
+        def node_call(node: NodeSpec, input_state: State) -> Callable[[], StageResult[State]]:
+            runner = self.mpi_runner
+            stage = node.stage
+            if stage is not None and node.resources.mpi_ranks > 1 and runner is not None:
+
+                def _run_mpi() -> StageResult[State]:
+                    return runner.run(stage, input_state, resources=node.resources)
+
+                return _run_mpi
+            return functools.partial(_run_stage, node.id, node.stage, input_state, stage_policy)
+
+        def split_input(node: NodeSpec, input_state: State) -> tuple[str, list[State]]:
+            # Stages declaring ``can_parallelize_over`` run as one job per chunk,
+            # sized to the resources free right now; MPI nodes are never split.
+            stage = node.stage
+            axis = stage.can_parallelize_over() if stage is not None else None
+            if axis is None or (node.resources.mpi_ranks > 1 and self.mpi_runner is not None):
+                return "", [input_state]
+            capacity = self.scheduler.capacity()
+            if capacity is None:
+                return "", [input_state]
+            n_chunks = _slots(node.resources, capacity)
+            if self.max_chunks is not None:
+                n_chunks = min(n_chunks, self.max_chunks)
+            chunks = split_state(input_state, axis, n_chunks)
+            if chunks is None:
+                return "", [input_state]
+            return axis, list(chunks)
+
+        def batch_call(payload: dict[str, Any]) -> Callable[[], list[StageResult[State]]]:
+            node = payload["node"]
+            cfgs = [member.stage.cfg for member, _ in payload["members"]]
+            return functools.partial(
+                _run_batch, node.id, node.stage, payload["input_state"], cfgs, stage_policy
+            )
+
+        def submit(node: NodeSpec, call: Callable[[], Any], *, block: bool) -> JobHandle | None:
+            if tracing:
+                call = functools.partial(timed_call, call)
+            scheduler_submit = self.scheduler.submit if block else self.scheduler.try_submit
+            return scheduler_submit(node.id, call, node.resources, attempt=attempts[node.id] + 1)
+
+        # Cache misses (and due retries) wait here, in priority order, for free resources.
+        waiting: dict[str, dict[str, Any]] = {}
+        waiting_heap: list[tuple[float, int, str]] = []
+        waiting_counter = itertools.count()
+        # Distinct resource requests among waiting nodes, used to stop scanning early.
+        waiting_shapes: Counter[_Shape] = Counter()
+        overtaken: dict[str, int] = {}
+
+        def enqueue(node_id: str, payload: dict[str, Any]) -> None:
+            waiting[node_id] = payload
+            waiting_shapes[_shape(payload["node"].resources)] += 1
+            entry = (-priorities.get(node_id, 0.0), next(waiting_counter), node_id)
+            heapq.heappush(waiting_heap, entry)
+
+        def start(node_id: str, *, block: bool = False) -> bool:
+            payload = waiting[node_id]
+            node = payload["node"]
+            now_ns = time.perf_counter_ns() if tracing else 0
+            axis, chunks = "", [payload["input_state"]]
+            if "members" in payload:
+                calls: list[Callable[[], Any]] = [batch_call(payload)]
+            else:
+                axis, chunks = split_input(node, payload["input_state"])
+                calls = [node_call(node, chunk) for chunk in chunks]
+            handles: list[JobHandle] = []
+            for call in calls:
+                # Later chunks were sized to fit, so they may block briefly.
+                handle = submit(node, call, block=block or bool(handles))
+                if handle is None:
+                    return False
+                handles.append(handle)
+            for member, _ in payload.get("members", [(node, None)]):
+                attempts[member.id] += 1
+            if tracing:
+                tracer.add("queue_wait", ready_at.get(node_id, now_ns), now_ns, node_id=node_id)
+                ready_at[node_id] = now_ns
+            del waiting[node_id]
+            overtaken.pop(node_id, None)
+            waiting_shapes[_shape(payload["node"].resources)] -= 1
+            payload.setdefault("started_at", time.time())
+            running[node_id] = {
+                **payload,
+                "handles": handles,
+                "axis": axis,
+                "chunks": chunks,
+                "parts": [None] * len(handles),
+            }
+            if self.retry_policy.timeout_s is not None:
+                running[node_id]["deadline"] = time.monotonic() + self.retry_policy.timeout_s
+            return True
+
+        def dispatch() -> None:
+            # Backfill: nodes that fit may overtake a blocked higher-priority node, but
+            # only ``backfill_limit`` times before its resources are held back for it.
+            blocked: str | None = None
+            skipped: list[tuple[float, int, str]] = []
+            rejected: set[_Shape] = set()
+            capacity = self.scheduler.capacity()
+            while waiting_heap:
+                if blocked is not None and overtaken.get(blocked, 0) >= self.backfill_limit:
+                    break
+                if capacity is not None and not any(
+                    count and shape not in rejected and _fits(shape, capacity)
+                    for shape, count in waiting_shapes.items()
+                ):
+                    break
+                entry = heapq.heappop(waiting_heap)
+                node_id = entry[2]
+                shape = _shape(waiting[node_id]["node"].resources)
+                if (
+                    shape in rejected
+                    or (capacity is not None and not _fits(shape, capacity))
+                    or not start(node_id)
+                ):
+                    rejected.add(shape)
+                    skipped.append(entry)
+                    blocked = blocked or node_id
+                    continue
+                if blocked is not None:
+                    overtaken[blocked] = overtaken.get(blocked, 0) + 1
+                if capacity is not None:
+                    capacity = self.scheduler.capacity()
+            for entry in skipped:
+                heapq.heappush(waiting_heap, entry)
+            if waiting and not running:
+                # Nothing in flight can free resources; wait for them on the head node.
+                start(heapq.heappop(waiting_heap)[2], block=True)
+
+        # Failed nodes wait here until their backoff expires, without blocking dispatch.
+        delayed: list[tuple[float, int, str, dict[str, Any]]] = []
+        delay_counter = itertools.count()
+        completed = False
+
+        try:
+            while ready or running or delayed or waiting:
+                while emitted:
+                    yield emitted.popleft()
+                now = time.monotonic()
+                while delayed and delayed[0][0] <= now:
+                    _, _, node_id, payload = heapq.heappop(delayed)
+                    enqueue(node_id, payload)
+
+                while ready:
+                    # Drain the ready set so its cache lookups can be probed concurrently.
+                    batch = [ready.pop() for _ in range(len(ready))]
+                    cache_keys: dict[str, str] = {}
+                    lookups: dict[str, DagCacheEntry | None] = {}
+                    if self.cache is not None:
+                        for node_id in batch:
+                            if node_id in seeds:
+                                continue
+                            if recipe_keys:
+                                cache_keys[node_id] = recipe_keys[node_id]
+                            else:
+                                cache_keys[node_id] = compute_cache_key(dag.nodes_by_id[node_id])
+                        if not recipe_keys:
+                            with tracer.span("cache.get_many", nodes=len(cache_keys)):
+                                lookups = self.cache.get_many(list(cache_keys.values()))
+
+                    sweep_groups: dict[str, list[tuple[NodeSpec, str | None]]] = {}
+                    for node_id in batch:
+                        node = dag.nodes_by_id[node_id]
+                        if node_id in seeds:
+                            reuse(node_id, seeds[node_id], seeded=True)
+                            continue
+                        cache_key = cache_keys.get(node_id)
+                        if cache_key is not None:
+                            if recipe_keys:
+                                cached = preloaded.pop(node_id, None)
+                                retained_bytes -= preloaded_sizes.pop(node_id, 0)
+                            else:
+                                cached = lookups.get(cache_key)
+                            if cached is not None:
+                                if cached.state_hash is not None:
+                                    state_hashes[node_id] = cached.state_hash
+                                result = StageResult(
+                                    state=cached.state,
+                                    metrics=cached.metrics,
+                                    provenance=cached.provenance,
+                                )
+                                reuse(node_id, result, cache_hit=True)
+                                continue
+
+                        sweep_batch = node.metadata.get("sweep_batch")
+                        if sweep_batch is not None:
+                            group = sweep_groups.setdefault(sweep_batch["group"], [])
+                            group.append((node, cache_key))
+                            continue
+                        input_state = build_input_state(node_id)
+                        enqueue(
+                            node_id,
+                            {"node": node, "input_state": input_state, "cache_key": cache_key},
+                        )
+
+                    # Sweep variants that missed the cache run ``size`` at a time in one
+                    # ``process_batch`` job, keyed (and prioritised) by the first member.
+                    for members in sweep_groups.values():
+                        size = members[0][0].metadata["sweep_batch"]["size"]
+                        for lo in range(0, len(members), size):
+                            chunk = members[lo : lo + size]
+                            head, cache_key = chunk[0]
+                            payload = {
+                                "node": head,
+                                "input_state": build_input_state(head.id),
+                                "cache_key": cache_key,
+                            }
+                            if len(chunk) > 1:
+                                payload["members"] = chunk
+                            enqueue(head.id, payload)
+
+                # Hits and seeds resolved above are streamed before blocking on the pool.
+                while emitted:
+                    yield emitted.popleft()
+                dispatch()
+                next_due = delayed[0][0] - time.monotonic() if delayed else None
+                if not running:
+                    if next_due is not None:
+                        time.sleep(max(next_due, 0.0))
+                    continue
+
+                # Each running node has a fixed deadline, so waking early for a due
+                # retry (or for other completions) never extends a hung node's timeout.
+                wait_s = None
+                if self.retry_policy.timeout_s is not None:
+                    deadline = min(payload["deadline"] for payload in running.values())
+                    wait_s = max(deadline - time.monotonic(), 0.0)
+                woke_for_retry = next_due is not None and (wait_s is None or next_due < wait_s)
+                if woke_for_retry:
+                    wait_s = max(next_due or 0.0, 0.0)
+                try:
+                    handle = self.scheduler.wait_any(
+                        [
+                            handle
+                            for payload in running.values()
+                            for handle, part in zip(payload["handles"], payload["parts"])
+                            if part is None
+                        ],
+                        timeout_s=wait_s,
+                    )
+                except SchedulerTimeoutError as exc:
+                    if woke_for_retry:
+                        continue
+                    raise SchedulerTimeoutError(str(exc)) from exc
+                node_id = handle.node_id
+                payload = running[node_id]
+                node = payload["node"]
+                started_at = payload["started_at"]
+                parts = payload["parts"]
+                index = next(i for i, h in enumerate(payload["handles"]) if h is handle)
+
+                try:
+                    result = handle.future.result(timeout=self.retry_policy.timeout_s)
+                    if tracing:
+                        timed: TimedValue = result
+                        result = timed.value
+                        tracer.add("pool_wait", ready_at[node_id], timed.start_ns, node_id=node_id)
+                        tracer.add(
+                            "stage",
+                            timed.start_ns,
+                            timed.end_ns,
+                            node_id=node_id,
+                            pid=timed.pid,
+                            tid=timed.tid,
+                            attempt=attempts[node_id],
+                            chunk=index,
                         )
-                        acc.consume(node.id, result)
-                        results[node_id] = result
+                    parts[index] = result
+                    if any(part is None for part in parts):
+                        continue
+                    # A sweep batch returns one result per member; chunks merge into one.
+                    outcomes: list[Any] = parts[0] if "members" in payload else parts
+                    if len(parts) > 1:
+                        outcomes = [
+                            merge_results(node.stage, payload["axis"], payload["chunks"], parts)
+                        ]
+                except Exception as exc:
+                    del running[node_id]
+                    # A failed chunk fails the whole node; drop its queued siblings.
+                    for sibling in payload["handles"]:
+                        sibling.future.cancel()
+                    payload = {
+                        key: value
+                        for key, value in payload.items()
+                        if key not in ("handles", "axis", "chunks", "parts")
+                    }
+                    node_retry = self.retry_policy.for_node(node)
+                    if node_retry.should_retry(exc, attempts[node_id]):
+                        due = time.monotonic() + node_retry.delay_s(attempts[node_id])
+                        heapq.heappush(delayed, (due, next(delay_counter), node_id, payload))
+                        continue
+                    error_msg = str(exc)
+                    # A failed sweep batch fails every variant in it.
+                    failed = [member.id for member, _ in payload.get("members", [(node, None)])]
+                    for failed_id in failed:
                         provenance_records.append(
                             NodeProvenance(
-                                node_id=node_id,
-                                started_at=time.time(),
+                                node_id=failed_id,
+                                started_at=started_at,
                                 finished_at=time.time(),
-                                attempts=attempts[node_id],
-                                cache_hit=True,
+                                attempts=attempts[failed_id],
+                                cache_hit=False,
+                                error=error_msg,
                             )
                         )
-                        execution_order.append(node_id)
-                        for dependent in dag.reverse_deps[node_id]:
-                            in_degree[dependent] -= 1
-                            if in_degree[dependent] == 0:
-                                ready.append(dependent)
+                        if journal is not None:
+                            journal.record_failure(failed_id, journal_keys[failed_id], error_msg)
+                    if self.on_error == "keep_going":
+                        for failed_id in failed:
+                            failures[failed_id] = error_msg
+                            consume_inputs(failed_id)
+                            block_dependents(failed_id)
+                            status[failed_id] = "failed"
                         continue
+                    # fail_fast: signal running stages before unwinding.
+                    token.cancel()
+                    if self.retry_policy.timeout_s is not None:
+                        raise SchedulerTimeoutError(error_msg) from exc
+                    raise SchedulerRetryError(error_msg) from exc
 
-                def _run(n: NodeSpec = node, st: State = input_state) -> StageResult[State]:
-                    return run_node(n, st)
+                del running[node_id]
+                finished_at = time.time()
+                members = payload.get("members") or [(node, payload["cache_key"])]
+                for (node, cache_key), result in zip(members, outcomes, strict=True):
+                    node_id = node.id
+                    cfg_hash = graph.cfg_hash(node_id)
+                    if cfg_hash is not None:
+                        result.provenance.setdefault("cfg_hash", cfg_hash)
+                    if policy_hash is not None:
+                        result.provenance.setdefault("policy_hash", policy_hash)
+                    result.provenance.setdefault("version", node.version or "v2")
+                    result.provenance.setdefault("wall_time_s", finished_at - started_at)
 
-                attempts[node_id] += 1
-                handle = self.scheduler.submit(
-                    node_id,
-                    _run,
-                    node.resources,
-                    attempt=attempts[node_id],
-                )
-                running[node_id] = {
-                    "handle": handle,
-                    "node": node,
-                    "input_state": input_state,
-                    "cache_key": cache_key,
-                    "started_at": time.time(),
-                }
-
-            if not running:
-                continue
-
-            try:
-                handle = self.scheduler.wait_any(
-                    [payload["handle"] for payload in running.values()],
-                    timeout_s=self.retry_policy.timeout_s,
-                )
-            except SchedulerTimeoutError as exc:
-                raise SchedulerTimeoutError(str(exc)) from exc
-            node_id = handle.node_id
-            payload = running.pop(node_id)
-            node = payload["node"]
-            started_at = payload["started_at"]
+                    acc.consume(node.id, result)
+                    store_result(node_id, result)
+                    if self.cache is not None:
+                        state_hash = None if recipe_keys else output_hash(node_id)
+                        with tracer.span("cache.put", node_id=node_id):
+                            self.cache.put(cache_key, result, state_hash=state_hash)
+                    if journal is not None:
+                        journal.record(
+                            node_id, journal_keys[node_id], result, cached=bool(recipe_keys)
+                        )
+                    if self.model_packager is not None and node.metadata.get("model_artifact"):
+                        package = self.model_packager.package(node_id, result)
+                        acc.provenance.setdefault("model_packages", []).append(
+                            {"node_id": node_id, "path": str(package.path)}
+                        )
 
-            try:
-                result = handle.future.result(timeout=self.retry_policy.timeout_s)
-            except Exception as exc:
-                if attempts[node_id] <= self.retry_policy.max_retries:
-                    time.sleep(self.retry_policy.backoff_s)
-                    attempts[node_id] += 1
-
-                    def _retry(
-                        n: NodeSpec = node, st: State = payload["input_state"]
-                    ) -> StageResult[State]:
-                        return run_node(n, st)
-
-                    handle = self.scheduler.submit(
-                        node_id,
-                        _retry,
-                        node.resources,
-                        attempt=attempts[node_id],
-                    )
-                    running[node_id] = {**payload, "handle": handle}
-                    continue
-                error_msg = str(exc)
-                provenance_records.append(
-                    NodeProvenance(
+                    record = NodeProvenance(
                         node_id=node_id,
                         started_at=started_at,
-                        finished_at=time.time(),
+                        finished_at=finished_at,
                         attempts=attempts[node_id],
-                        cache_hit=False,
-                        error=error_msg,
                     )
-                )
-                if self.retry_policy.timeout_s is not None:
-                    raise SchedulerTimeoutError(error_msg) from exc
-                raise SchedulerRetryError(error_msg) from exc
-
-            finished_at = time.time()
-            if getattr(node.stage, "cfg", None) is not None:
-                result.provenance.setdefault("cfg_hash", hash_model(node.stage.cfg))
-            if policy_hash is not None:
-                result.provenance.setdefault("policy_hash", policy_hash)
-            result.provenance.setdefault("version", node.version or "v2")
-            result.provenance.setdefault("wall_time_s", finished_at - started_at)
-
-            acc.consume(node.id, result)
-            results[node_id] = result
+                    provenance_records.append(record)
+                    emitted.append(NodeEvent(node_id, result, record))
+                    execution_order.append(node_id)
+                    # Inputs stay referenced by the waiting/running payload until now.
+                    consume_inputs(node_id)
+                    advance(node_id)
+            while emitted:
+                yield emitted.popleft()
             if self.cache is not None:
-                self.cache.put(payload["cache_key"], result)
-            if self.model_packager is not None and node.metadata.get("model_artifact"):
-                package = self.model_packager.package(node_id, result)
-                acc.provenance.setdefault("model_packages", []).append(
-                    {"node_id": node_id, "path": str(package.path)}
-                )
-
-            provenance_records.append(
-                NodeProvenance(
-                    node_id=node_id,
-                    started_at=started_at,
-                    finished_at=finished_at,
-                    attempts=attempts[node_id],
-                )
-            )
-            execution_order.append(node_id)
-
-            for dependent in dag.reverse_deps[node_id]:
-                in_degree[dependent] -= 1
-                if in_degree[dependent] == 0:
-                    ready.append(dependent)
+                # Surface write-behind failures from this run rather than at exit.
+                self.cache.flush()
+            completed = True
+        finally:
+            # On errors or an abandoned generator, don't block on stages still running.
+            if not completed:
+                token.cancel()
+            if shutdown:
+                self._end_run(completed)
+            token.close()
+            if journal is not None:
+                journal.sync()
 
-        self.scheduler.shutdown()
-        acc.provenance["node_runs"] = [asdict(record) for record in provenance_records]
+        # Records hold only scalars, so skip ``asdict``'s recursive deep copy.
+        acc.provenance["node_runs"] = [
+            {name: getattr(record, name) for name in _PROVENANCE_FIELDS}
+            for record in provenance_records
+        ]
+        if release:
+            acc.metrics["executor.peak_retained_bytes"] = float(peak_retained_bytes)
         return DagRunResult(
             results=results,
             metrics=acc.metrics,
             artifacts=acc.artifacts,
             provenance=acc.provenance,
             execution_order=execution_order,
+            failures=failures,
+            blocked=blocked,
         )
@@ -1,12 +1,21 @@
+from __future__ import annotations
+
 import hashlib
 import json
-from collections.abc import Mapping
-from typing import Any
+import os
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
 import numpy as np
 from pydantic import BaseModel
 
-from .types import State
+if TYPE_CHECKING:
+    # ``types`` imports ``hash_ndarray`` from here, so only import it for annotations.
+    from .types import NodeSpec, State
 
 # --- Hashing utility ---
 
@@ -19,17 +28,105 @@ def hash_model(model: BaseModel) -> str:
     return hashlib.sha256(stable_json(model.model_dump())).hexdigest()
 
 
+def hash_node_cfg(node: NodeSpec) -> str | None:
+    """Hash of the node's stage config, or ``None`` if it has none (or is unhashable)."""
+    cfg = getattr(node.stage, "cfg", None)
+    if cfg is None:
+        return None
+    try:
+        return hash_model(cfg)
+    except Exception:
+        return None
+
+
 def hash_policy(policy: Mapping[str, Any]) -> str:
     return hashlib.sha256(stable_json(dict(policy))).hexdigest()
 
 
+@dataclass(frozen=True, slots=True)
+class HashEngine:
+    """How ``hash_ndarray`` digests array bytes.
+
+    ``chunk_bytes=0`` is the original single pass over a contiguous copy of the
+    array. With ``chunk_bytes > 0`` the array is tree-hashed instead: it is split
+    along its first axis into leaves of at most ``chunk_bytes`` (at least one
+    row), each leaf is digested separately (strided arrays are copied one leaf at
+    a time, never whole) and the leaf digests are digested together with the
+    dtype and shape. ``hashlib``
+    releases the GIL on large buffers, so ``workers > 1`` hashes leaves on a
+    thread pool; the digest does not depend on ``workers``.
+    """
+
+    algorithm: str = "sha256"
+    chunk_bytes: int = 0
+    workers: int = 1
+
+    def _new(self) -> Any:
+        return hashlib.new(self.algorithm)
+
+    def hash_array(self, a: np.ndarray) -> bytes:
+        if not self.chunk_bytes:
+            a = np.ascontiguousarray(a)
+            h = self._new()
+            h.update(str(a.dtype).encode())
+            h.update(str(a.shape).encode())
+            h.update(a.data)
+            return h.digest()
+        rows = a.reshape(1) if a.ndim == 0 else a
+        row_bytes = rows[:1].nbytes or 1
+        step = max(self.chunk_bytes // row_bytes, 1)
+
+        def leaf(lo: int) -> bytes:
+            # A view for C-contiguous arrays; strided ones copy only this leaf.
+            block = np.ascontiguousarray(rows[lo : lo + step])
+            return hashlib.new(self.algorithm, block.data).digest()
+
+        starts = range(0, len(rows), step)
+        if self.workers > 1 and len(starts) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(starts))) as pool:
+                leaves = list(pool.map(leaf, starts))
+        else:
+            leaves = [leaf(lo) for lo in starts]
+        h = self._new()
+        h.update(f"tree:{self.chunk_bytes}".encode())
+        h.update(str(a.dtype).encode())
+        h.update(str(a.shape).encode())
+        for digest in leaves:
+            h.update(digest)
+        return h.digest()
+
+
+LEGACY_HASH_ENGINE = HashEngine()
+
+# Array hashing engine per cache version. Keys written under a version only stay
+# valid if its engine never changes, so add a new version for a new engine.
+HASH_ENGINES: dict[str, HashEngine] = {
+    "v2": LEGACY_HASH_ENGINE,
+    "v3": HashEngine(chunk_bytes=4 << 20, workers=min(os.cpu_count() or 1, 8)),
+}
+
+_active_engine: ContextVar[HashEngine] = ContextVar("hash_engine", default=LEGACY_HASH_ENGINE)
+
+
+def hash_engine(cache_version: str) -> HashEngine:
+    try:
+        return HASH_ENGINES[cache_version]
+    except KeyError:
+        raise ValueError(f"Unsupported cache_version: {cache_version}") from None
+
+
+@contextmanager
+def use_hash_engine(engine: HashEngine) -> Iterator[None]:
+    """Make ``hash_ndarray`` (and so ``State.hashable_repr``) use ``engine``."""
+    token = _active_engine.set(engine)
+    try:
+        yield
+    finally:
+        _active_engine.reset(token)
+
+
 def hash_ndarray(a: np.ndarray) -> bytes:
-    a = np.ascontiguousarray(a)
-    h = hashlib.sha256()
-    h.update(str(a.dtype).encode())
-    h.update(str(a.shape).encode())
-    h.update(a.data)
-    return h.digest()
+    return _active_engine.get().hash_array(a)
 
 
 def digest_many(*parts: str) -> str:
@@ -39,8 +136,12 @@ def digest_many(*parts: str) -> str:
     return h.hexdigest()
 
 
-def hash_state(state: State) -> str:
-    return hashlib.sha256(state.hashable_repr()).hexdigest()
+def hash_state(state: State, engine: HashEngine | None = None) -> str:
+    """Digest of ``state.hashable_repr()``, hashing its arrays with ``engine``."""
+    if engine is None:
+        return hashlib.sha256(state.hashable_repr()).hexdigest()
+    with use_hash_engine(engine):
+        return hashlib.sha256(state.hashable_repr()).hexdigest()
 
 
 def hash_dag_node(
@@ -49,11 +150,17 @@ def hash_dag_node(
     op_name: str,
     version: str,
     cfg_hash: str | None,
-    input_hash: str,
+    input_hash: str | None,
     dep_hashes: dict[str, str],
     policy_hash: str | None,
     cache_version: str = "v2",
 ) -> str:
+    """Compose a node cache key from precomputed digests.
+
+    Keys are Merkle-style: a node with dependencies is identified by the output
+    digests of its deps, so ``input_hash`` is only needed for root nodes (the
+    initial-state digest) and may be ``None`` otherwise.
+    """
     payload = {
         "cache_version": cache_version,
         "node_id": node_id,
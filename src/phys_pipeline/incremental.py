@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from .dag import PipelineGraph
+from .executor import DagExecutor, DagRunResult, compute_recipe_keys
+from .hashing import hash_policy, hash_state
+from .policy import PolicyLike, as_policy
+from .types import NodeSpec, StageResult, State
+
+
+class IncrementalDagSession:
+    """Re-run an edited DAG, executing only dirty nodes and their descendants.
+
+    The session keeps the previous run's node outputs and recipe digests in
+    memory. A node is clean when its digest (op name, version, cfg hash, policy
+    hash, dependency digests and, for roots, the initial-state hash) matches the
+    previous run; clean outputs are handed to the executor as seeds, so editing
+    one ``StageConfig`` recomputes only that node's downstream closure.
+
+    Example:
+        session = IncrementalDagSession()
+        session.run(SimpleState(payload=0), nodes)
+        session.run(SimpleState(payload=0), edited_nodes)  # only dirty nodes run
+
+    For an interactive loop, keep one warm executor for the whole session:
+    ``with DagExecutor(...) as executor: IncrementalDagSession(lambda: executor)``.
+    """
+
+    def __init__(self, make_executor: Callable[[], DagExecutor] = DagExecutor):
+        self._make_executor = make_executor
+        self._digests: dict[str, str] = {}
+        self._results: dict[str, StageResult[State]] = {}
+        self.last_dirty: list[str] = []
+
+    def _digest_nodes(
+        self,
+        executor: DagExecutor,
+        initial_state: State,
+        graph: PipelineGraph,
+        policy: PolicyLike | None,
+    ) -> tuple[list[str], dict[str, str]]:
+        run_policy = as_policy(policy) if policy is not None else executor.policy
+        policy_hash = hash_policy(run_policy) if run_policy is not None else None
+        return graph.ids, compute_recipe_keys(graph, hash_state(initial_state), policy_hash)
+
+    def _clean(self, digests: dict[str, str]) -> dict[str, StageResult[State]]:
+        return {
+            node_id: self._results[node_id]
+            for node_id, digest in digests.items()
+            if self._digests.get(node_id) == digest and node_id in self._results
+        }
+
+    def diff(
+        self,
+        initial_state: State,
+        nodes: list[NodeSpec],
+        *,
+        policy: PolicyLike | None = None,
+    ) -> list[str]:
+        """Return the node ids that the next ``run`` would execute, in topological order."""
+        graph = PipelineGraph.from_nodes(nodes)
+        order, digests = self._digest_nodes(self._make_executor(), initial_state, graph, policy)
+        clean = self._clean(digests)
+        return [node_id for node_id in order if node_id not in clean]
+
+    def run(
+        self,
+        initial_state: State,
+        nodes: list[NodeSpec],
+        *,
+        policy: PolicyLike | None = None,
+        **run_kwargs: Any,
+    ) -> DagRunResult:
+        executor = self._make_executor()
+        graph = PipelineGraph.from_nodes(nodes)
+        order, digests = self._digest_nodes(executor, initial_state, graph, policy)
+        clean = self._clean(digests)
+        result = executor.run(initial_state, graph, policy=policy, seed=clean, **run_kwargs)
+
+        self._digests = digests
+        self._results = {**clean, **result.results}
+        self.last_dirty = [node_id for node_id in order if node_id not in clean]
+        result.results = {
+            node_id: self._results[node_id] for node_id in order if node_id in self._results
+        }
+        result.provenance["incremental"] = {
+            "dirty": self.last_dirty,
+            "reused": [node_id for node_id in order if node_id in clean],
+        }
+        return result
+
+    def reset(self) -> None:
+        self._digests.clear()
+        self._results.clear()
+        self.last_dirty = []
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any
+
+from .cache import DiskCache
+from .dag_cache import DagCache
+from .types import StageResult, State
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+class RunJournal:
+    """Append-only, crash-safe record of completed DAG nodes.
+
+    Each completed node appends one JSON line (node id, recipe key, status and a
+    pointer to its persisted output). Lines are flushed to the OS on every append,
+    so they survive a killed coordinator; ``fsync`` is batched every
+    ``fsync_every`` records or ``fsync_interval_s`` seconds so the journal keeps
+    up with thousands of nodes per minute. Outputs live in ``<root>/outputs``
+    unless the executor's recipe-keyed cache already holds them.
+
+    Pass the journal to ``DagExecutor.run(..., journal=...)`` and, after a crash,
+    to ``DagExecutor.resume(journal, ...)``.
+    """
+
+    def __init__(
+        self,
+        root: Path | str,
+        *,
+        fsync_every: int = 64,
+        fsync_interval_s: float = 1.0,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.path = self.root / JOURNAL_FILE
+        self.store = DagCache(DiskCache(self.root / "outputs"))
+        self.fsync_every = fsync_every
+        self.fsync_interval_s = fsync_interval_s
+        self._file = self.path.open("a", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _append(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if (
+                self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval_s
+            ):
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record(
+        self,
+        node_id: str,
+        key: str,
+        result: StageResult[State],
+        *,
+        cached: bool = False,
+    ) -> None:
+        """Persist ``result`` (unless ``cached``) and append a ``done`` record."""
+        if not cached:
+            self.store.put(key, result)
+        self._append(
+            {
+                "node_id": node_id,
+                "key": key,
+                "status": "done",
+                "ref": "cache" if cached else "journal",
+            }
+        )
+
+    def record_failure(self, node_id: str, key: str, error: str) -> None:
+        self._append({"node_id": node_id, "key": key, "status": "failed", "error": error})
+
+    def entries(self) -> list[dict[str, Any]]:
+        """All readable records, in order; a torn final line from a crash is ignored."""
+        with self._lock:
+            self._file.flush()
+        records = []
+        with self.path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+        return records
+
+    def completed(self) -> dict[str, dict[str, Any]]:
+        """Latest ``done`` record per node id."""
+        done: dict[str, dict[str, Any]] = {}
+        for record in self.entries():
+            if record.get("status") == "done":
+                done[record["node_id"]] = record
+            else:
+                done.pop(record["node_id"], None)
+        return done
+
+    def load(
+        self, record: dict[str, Any], cache: DagCache | None = None
+    ) -> StageResult[State] | None:
+        """Load the output a ``done`` record points to, or ``None`` if it is gone."""
+        store = cache if record.get("ref") == "cache" else self.store
+        if store is None:
+            return None
+        entry = store.get(record["key"])
+        if entry is None:
+            return None
+        return StageResult(state=entry.state, metrics=entry.metrics, provenance=entry.provenance)
+
+    def sync(self) -> None:
+        with self._lock:
+            self._file.flush()
+            self._sync_locked()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    def __enter__(self) -> RunJournal:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+from .errors import StageContractError
+from .types import PipelineStage, SimpleState, StageResult, State
+
+
+def _leading(value: Any, length: int) -> bool:
+    return isinstance(value, np.ndarray) and value.ndim > 0 and value.shape[0] == length
+
+
+def _axis_array(state: SimpleState, axis: str) -> Any:
+    return state.payload if axis == "payload" else state.meta.get(axis)
+
+
+def split_state(state: State, axis: str, n_chunks: int) -> list[SimpleState] | None:
+    """Split ``state`` into up to ``n_chunks`` contiguous slices along ``axis``.
+
+    ``axis`` names the array to split: ``"payload"`` or a ``meta`` key. The payload
+    and every ``meta`` array sharing its leading length are sliced together (e.g.
+    rays and their weights, or field samples and ``meta["omega"]``); other values
+    are passed to every chunk unchanged. Slices are views, not copies. Returns
+    ``None`` when the state cannot be split into at least two chunks.
+    """
+    if not isinstance(state, SimpleState):
+        return None
+    source = _axis_array(state, axis)
+    if not isinstance(source, np.ndarray) or source.ndim == 0:
+        return None
+    length = source.shape[0]
+    n_chunks = min(n_chunks, length)
+    if n_chunks < 2:
+        return None
+    split_payload = _leading(state.payload, length)
+    aligned = {key for key, value in state.meta.items() if _leading(value, length)}
+    bounds = np.linspace(0, length, n_chunks + 1).astype(int)
+    chunks = []
+    for lo, hi in zip(bounds[:-1], bounds[1:], strict=True):
+        meta = {key: value[lo:hi] if key in aligned else value for key, value in state.meta.items()}
+        payload = state.payload[lo:hi] if split_payload else state.payload
+        chunks.append(SimpleState(payload=payload, meta=meta))
+    return chunks
+
+
+def merge_results(
+    stage: PipelineStage[Any, Any],
+    axis: str,
+    chunks: list[SimpleState],
+    parts: list[StageResult[Any]],
+) -> StageResult[Any]:
+    """Reassemble the results of running ``stage`` on ``chunks`` split along ``axis``.
+
+    Output arrays (payload or ``meta``) whose leading length matches their input
+    chunk in every part are concatenated; anything else is taken from the first
+    part, as are artifacts and provenance. Metrics are combined with
+    ``stage.reduce_metrics``.
+    """
+    states = [part.state for part in parts]
+    if not all(isinstance(state, SimpleState) for state in states):
+        raise StageContractError("Chunked stages must return SimpleState results.")
+    lengths = [_axis_array(chunk, axis).shape[0] for chunk in chunks]
+
+    def combine(values: list[Any]) -> Any:
+        if all(_leading(value, n) for value, n in zip(values, lengths, strict=True)):
+            return np.concatenate(values)
+        return values[0]
+
+    meta = {key: combine([state.meta.get(key) for state in states]) for key in states[0].meta}
+    merged = SimpleState(payload=combine([state.payload for state in states]), meta=meta)
+    return StageResult(
+        state=merged,
+        metrics=stage.reduce_metrics([part.metrics for part in parts]),
+        artifacts=dict(parts[0].artifacts),
+        provenance={**parts[0].provenance, "chunks": len(parts)},
+    )
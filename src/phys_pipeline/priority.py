@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections.abc import Callable, Iterable
+
+from .dag import Dag
+from .types import NodeSpec
+
+# Maps a validated DAG to a per-node score; higher scores are dispatched first.
+PriorityFn = Callable[[Dag], dict[str, float]]
+
+
+def node_cost(node: NodeSpec) -> float:
+    return node.stage.estimated_cost() if node.stage is not None else 0.0
+
+
+def upward_rank(dag: Dag) -> dict[str, float]:
+    """Longest ``estimated_cost``-weighted path from each node to a sink (HEFT rank)."""
+    rank: dict[str, float] = {}
+    for node_id in reversed(dag.topo_order):
+        tail = max((rank[dep] for dep in dag.reverse_deps[node_id]), default=0.0)
+        rank[node_id] = node_cost(dag.nodes_by_id[node_id]) + tail
+    return rank
+
+
+def shortest_job_first(dag: Dag) -> dict[str, float]:
+    return {node_id: -node_cost(node) for node_id, node in dag.nodes_by_id.items()}
+
+
+def largest_resource_first(dag: Dag) -> dict[str, float]:
+    return {
+        node_id: float(node.resources.cpu + node.resources.gpu)
+        for node_id, node in dag.nodes_by_id.items()
+    }
+
+
+def fifo(dag: Dag) -> dict[str, float]:
+    return dict.fromkeys(dag.nodes_by_id, 0.0)
+
+
+class ReadyQueue:
+    """Priority queue of ready node ids; ties keep insertion (FIFO) order."""
+
+    def __init__(self, priorities: dict[str, float], node_ids: Iterable[str] = ()):
+        self._priorities = priorities
+        self._heap: list[tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        for node_id in node_ids:
+            self.push(node_id)
+
+    def push(self, node_id: str) -> None:
+        priority = self._priorities.get(node_id, 0.0)
+        heapq.heappush(self._heap, (-priority, next(self._counter), node_id))
+
+    def pop(self) -> str:
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self) -> int:
+        return len(self._heap)
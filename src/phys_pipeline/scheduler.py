@@ -1,16 +1,34 @@
 from __future__ import annotations
 
+import functools
 import itertools
+import multiprocessing
 import threading
+import time
+import tracemalloc
 from collections.abc import Callable, Sequence
-from concurrent.futures import Future, ThreadPoolExecutor, wait
-from dataclasses import dataclass
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, replace
 from datetime import UTC, datetime
-from typing import Any
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import Any, NamedTuple, Self
 
-from .errors import SchedulerError, SchedulerTimeoutError
+from .errors import SchedulerError, SchedulerTimeoutError, SchedulerWorkerCrashError
+from .trace import NULL_TRACER, Tracer
+from .transport import (
+    SHM_MIN_BYTES,
+    export_call,
+    export_value,
+    import_call,
+    import_value,
+    release_blocks,
+)
 from .types import NodeResources
 
+_CANCEL_POLL_S = 0.1
+
 
 @dataclass(slots=True)
 class JobHandle:
@@ -25,6 +43,8 @@ class JobHandle:
 class Scheduler:
     """Scheduler interface for DAG execution."""
 
+    tracer: Tracer = NULL_TRACER
+
     def submit(
         self,
         node_id: str,
@@ -35,39 +55,275 @@ class Scheduler:
     ) -> JobHandle:
         raise NotImplementedError
 
+    def try_submit(
+        self,
+        node_id: str,
+        fn: Callable[[], Any],
+        resources: NodeResources,
+        *,
+        attempt: int = 1,
+    ) -> JobHandle | None:
+        """Submit only if ``resources`` are free right now; return ``None`` otherwise.
+
+        Schedulers without resource accounting always admit the job.
+        """
+        return self.submit(node_id, fn, resources, attempt=attempt)
+
+    def capacity(self) -> NodeResources | None:
+        """Currently free resources, or ``None`` if the scheduler does not track them."""
+        return None
+
     def wait_any(self, handles: Sequence[JobHandle], timeout_s: float | None = None) -> JobHandle:
         raise NotImplementedError
 
-    def shutdown(self) -> None:
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop accepting work; with ``wait=False`` cancel queued jobs and return at once."""
         raise NotImplementedError
 
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.shutdown(wait=exc_type is None)
+
+
+def _wait_any(handles: Sequence[JobHandle], timeout_s: float | None) -> JobHandle:
+    # ``Future.cancel()`` (as done by ``shutdown(wait=False)``) never wakes
+    # ``concurrent.futures.wait``, so poll for cancelled jobs while waiting.
+    futures = {handle.future: handle for handle in handles}
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    while True:
+        for future, handle in futures.items():
+            if future.cancelled():
+                return handle
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+        poll = _CANCEL_POLL_S if remaining is None else min(remaining, _CANCEL_POLL_S)
+        done, _ = wait(futures.keys(), return_when="FIRST_COMPLETED", timeout=poll)
+        if done:
+            return futures[next(iter(done))]
+        if remaining is not None and remaining <= poll:
+            raise SchedulerTimeoutError("Scheduler wait timed out.")
+
+
+class MemoryTracker:
+    """Measured per-node peak memory, used as the estimate when ``memory_gb`` is unset.
+
+    Pass one to a scheduler to enable measured mode; reuse it across runs so later
+    runs are admitted against the peaks observed in earlier ones. Peaks come from
+    ``tracemalloc`` (Python and NumPy allocations), which slows allocation-heavy
+    code. They are exact in ``ProcessScheduler`` workers; with concurrent threads in
+    ``LocalScheduler`` they include overlapping jobs and so err on the high side.
+    """
+
+    def __init__(self) -> None:
+        self.peak_gb: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, node_id: str, peak_bytes: int) -> None:
+        with self._lock:
+            self.peak_gb[node_id] = max(self.peak_gb.get(node_id, 0.0), peak_bytes / 2**30)
+
+    def estimate(self, node_id: str) -> float | None:
+        return self.peak_gb.get(node_id)
+
+
+class _PeakProbe:
+    """``tracemalloc`` peak measurement that tolerates concurrent jobs in one process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._active = 0
+        self._started = False
+
+    def start(self) -> int:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            # Only reset when idle, so overlapping jobs over- rather than under-estimate.
+            if self._active == 0:
+                tracemalloc.reset_peak()
+            self._active += 1
+            return tracemalloc.get_traced_memory()[0]
+
+    def stop(self, baseline: int) -> int:
+        peak = tracemalloc.get_traced_memory()[1]
+        with self._lock:
+            self._active -= 1
+        return max(peak - baseline, 0)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._started and self._active == 0:
+                tracemalloc.stop()
+                self._started = False
+
+
+_PEAK_PROBE = _PeakProbe()
+
+
+class _Measured(NamedTuple):
+    value: Any
+    peak_bytes: int
+
+
+def _measured(fn: Callable[[], Any]) -> _Measured:
+    baseline = _PEAK_PROBE.start()
+    try:
+        value = fn()
+    finally:
+        peak = _PEAK_PROBE.stop(baseline)
+    return _Measured(value, peak)
+
+
+class _ResourceSlots:
+    """CPU/GPU/memory accounting shared by the local schedulers."""
+
+    def __init__(
+        self,
+        *,
+        max_cpu: int,
+        max_gpu: int,
+        max_memory_gb: float | None = None,
+        memory_tracker: MemoryTracker | None = None,
+    ):
+        self.max_cpu = max_cpu
+        self.max_gpu = max_gpu
+        self.max_memory_gb = max_memory_gb
+        self.memory_tracker = memory_tracker
+        self.available_cpu = max_cpu
+        self.available_gpu = max_gpu
+        self.available_memory_gb = max_memory_gb
+        self.cond = threading.Condition()
+
+    def claim(self, node_id: str, resources: NodeResources) -> NodeResources:
+        """Resources to reserve for ``node_id``, filling in measured memory if unset."""
+        if resources.memory_gb is not None or self.memory_tracker is None:
+            return resources
+        estimate = self.memory_tracker.estimate(node_id)
+        if estimate is None:
+            return resources
+        if self.max_memory_gb is not None:
+            estimate = min(estimate, self.max_memory_gb)
+        return replace(resources, memory_gb=estimate)
+
+    def _check(self, resources: NodeResources) -> None:
+        if (
+            resources.cpu > self.max_cpu
+            or resources.gpu > self.max_gpu
+            or (
+                self.max_memory_gb is not None and (resources.memory_gb or 0.0) > self.max_memory_gb
+            )
+        ):
+            raise SchedulerError(f"Requested resources exceed scheduler limits: {resources}")
+
+    def _fits(self, resources: NodeResources) -> bool:
+        if resources.cpu > self.available_cpu or resources.gpu > self.available_gpu:
+            return False
+        available_memory = self.available_memory_gb
+        return available_memory is None or (resources.memory_gb or 0.0) <= available_memory
+
+    def _take(self, resources: NodeResources, sign: int = 1) -> None:
+        self.available_cpu -= sign * resources.cpu
+        self.available_gpu -= sign * resources.gpu
+        if self.available_memory_gb is not None:
+            self.available_memory_gb -= sign * (resources.memory_gb or 0.0)
+
+    def acquire(self, resources: NodeResources) -> None:
+        self._check(resources)
+        with self.cond:
+            while not self._fits(resources):
+                self.cond.wait()
+            self._take(resources)
+
+    def try_acquire(self, resources: NodeResources) -> bool:
+        self._check(resources)
+        with self.cond:
+            if not self._fits(resources):
+                return False
+            self._take(resources)
+            return True
+
+    def free(self) -> NodeResources:
+        with self.cond:
+            return NodeResources(
+                cpu=self.available_cpu,
+                gpu=self.available_gpu,
+                memory_gb=self.available_memory_gb,
+            )
+
+    def release(self, resources: NodeResources) -> None:
+        with self.cond:
+            self._take(resources, sign=-1)
+            self.cond.notify_all()
+
 
 class LocalScheduler(Scheduler):
-    """Local thread-based scheduler with simple resource slots."""
+    """Local thread-based scheduler with simple resource slots.
 
-    def __init__(self, *, max_workers: int = 4, max_cpu: int = 4, max_gpu: int = 0):
+    ``max_memory_gb`` admits nodes only while the sum of their ``memory_gb`` fits;
+    a ``memory_tracker`` measures each node's peak and supplies it when unset.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 4,
+        max_cpu: int = 4,
+        max_gpu: int = 0,
+        max_memory_gb: float | None = None,
+        memory_tracker: MemoryTracker | None = None,
+    ):
         self._executor = ThreadPoolExecutor(max_workers=max_workers)
-        self._max_cpu = max_cpu
-        self._max_gpu = max_gpu
-        self._available_cpu = max_cpu
-        self._available_gpu = max_gpu
-        self._cond = threading.Condition()
+        self._slots = _ResourceSlots(
+            max_cpu=max_cpu,
+            max_gpu=max_gpu,
+            max_memory_gb=max_memory_gb,
+            memory_tracker=memory_tracker,
+        )
         self._counter = itertools.count(1)
 
     def _acquire(self, resources: NodeResources) -> None:
-        if resources.cpu > self._max_cpu or resources.gpu > self._max_gpu:
-            raise SchedulerError(f"Requested resources exceed scheduler limits: {resources}")
-        with self._cond:
-            while resources.cpu > self._available_cpu or resources.gpu > self._available_gpu:
-                self._cond.wait()
-            self._available_cpu -= resources.cpu
-            self._available_gpu -= resources.gpu
+        self._slots.acquire(resources)
 
     def _release(self, resources: NodeResources) -> None:
-        with self._cond:
-            self._available_cpu += resources.cpu
-            self._available_gpu += resources.gpu
-            self._cond.notify_all()
+        self._slots.release(resources)
+
+    def _run(self, node_id: str, fn: Callable[[], Any], claim: NodeResources) -> Any:
+        # Release before the future resolves so a woken coordinator sees free slots.
+        try:
+            tracker = self._slots.memory_tracker
+            if tracker is None:
+                return fn()
+            measured = _measured(fn)
+            tracker.observe(node_id, measured.peak_bytes)
+            return measured.value
+        finally:
+            self._release(claim)
+
+    def _start(
+        self, node_id: str, fn: Callable[[], Any], claim: NodeResources, attempt: int
+    ) -> JobHandle:
+        try:
+            future = self._executor.submit(self._run, node_id, fn, claim)
+        except BaseException:
+            self._release(claim)
+            raise
+        future.add_done_callback(lambda f: self._release(claim) if f.cancelled() else None)
+        job_id = f"local-{next(self._counter)}"
+        return JobHandle(
+            job_id=job_id,
+            node_id=node_id,
+            future=future,
+            resources=claim,
+            submitted_at=datetime.now(UTC),
+            attempt=attempt,
+        )
 
     def submit(
         self,
@@ -77,12 +333,208 @@ class LocalScheduler(Scheduler):
         *,
         attempt: int = 1,
     ) -> JobHandle:
-        self._acquire(resources)
-        future = self._executor.submit(fn)
-        future.add_done_callback(lambda _: self._release(resources))
-        job_id = f"local-{next(self._counter)}"
+        claim = self._slots.claim(node_id, resources)
+        with self.tracer.span("scheduler.acquire", node_id=node_id):
+            self._acquire(claim)
+        return self._start(node_id, fn, claim, attempt)
+
+    def try_submit(
+        self,
+        node_id: str,
+        fn: Callable[[], Any],
+        resources: NodeResources,
+        *,
+        attempt: int = 1,
+    ) -> JobHandle | None:
+        claim = self._slots.claim(node_id, resources)
+        if not self._slots.try_acquire(claim):
+            return None
+        return self._start(node_id, fn, claim, attempt)
+
+    def capacity(self) -> NodeResources:
+        return self._slots.free()
+
+    def wait_any(self, handles: Sequence[JobHandle], timeout_s: float | None = None) -> JobHandle:
+        return _wait_any(handles, timeout_s)
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+        if self._slots.memory_tracker is not None:
+            _PEAK_PROBE.close()
+
+
+def _run_job(fn: Callable[[], Any], shm_min_bytes: int, measure: bool = False) -> Any:
+    call = import_call(fn)
+    if measure:
+        return export_value(_measured(call), min_bytes=shm_min_bytes)
+    return export_value(call(), min_bytes=shm_min_bytes)
+
+
+@dataclass(slots=True)
+class _ProcessJob:
+    node_id: str
+    call: Callable[[], Any]
+    future: Future[Any]
+    blocks: list[SharedMemory]
+    resources: NodeResources
+    crashes: int = 0
+
+
+class ProcessScheduler(Scheduler):
+    """Process-pool scheduler for stages that hold the GIL.
+
+    Submitted callables must be picklable (module-level functions or
+    ``functools.partial`` objects wrapping them). ``State`` arguments and the
+    returned ``StageResult`` state move their large NumPy arrays through
+    ``multiprocessing.shared_memory`` instead of the worker pipe. If a worker
+    dies, the pool is respawned and in-flight jobs are resubmitted up to
+    ``max_crash_retries`` times each. ``max_memory_gb`` and ``memory_tracker``
+    behave as in ``LocalScheduler``; peaks are measured inside the worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 4,
+        max_cpu: int = 4,
+        max_gpu: int = 0,
+        start_method: str = "spawn",
+        shm_min_bytes: int = SHM_MIN_BYTES,
+        max_crash_retries: int = 2,
+        max_memory_gb: float | None = None,
+        memory_tracker: MemoryTracker | None = None,
+    ):
+        self._max_workers = max_workers
+        self._context = multiprocessing.get_context(start_method)
+        self._slots = _ResourceSlots(
+            max_cpu=max_cpu,
+            max_gpu=max_gpu,
+            max_memory_gb=max_memory_gb,
+            memory_tracker=memory_tracker,
+        )
+        self._shm_min_bytes = shm_min_bytes
+        self._max_crash_retries = max_crash_retries
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._closed = False
+        self._pool = self._new_pool()
+        self.respawns = 0
+
+    @property
+    def _measure(self) -> bool:
+        return self._slots.memory_tracker is not None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self._max_workers, mp_context=self._context)
+
+    def _respawn(self, generation: int) -> None:
+        with self._lock:
+            if self._closed or generation != self._generation:
+                return
+            old = self._pool
+            self._pool = self._new_pool()
+            self._generation += 1
+            self.respawns += 1
+        old.shutdown(wait=False)
+
+    def _dispatch(self, job: _ProcessJob) -> None:
+        while True:
+            with self._lock:
+                generation = self._generation
+                try:
+                    inner = self._pool.submit(
+                        _run_job, job.call, self._shm_min_bytes, self._measure
+                    )
+                except BrokenProcessPool:
+                    inner = None
+            if inner is not None:
+                break
+            self._respawn(generation)
+        inner.add_done_callback(functools.partial(self._on_done, job, generation))
+
+    def _on_done(self, job: _ProcessJob, generation: int, inner: Future[Any]) -> None:
+        if inner.cancelled():
+            release_blocks(job.blocks)
+            self._slots.release(job.resources)
+            job.future.cancel()
+            return
+        exc = inner.exception()
+        if isinstance(exc, BrokenProcessPool) and not self._closed:
+            if job.crashes < self._max_crash_retries:
+                job.crashes += 1
+                self._respawn(generation)
+                self._dispatch(job)
+                return
+            exc = SchedulerWorkerCrashError(
+                f"Worker crashed {job.crashes + 1} times while running node '{job.node_id}'."
+            )
+        release_blocks(job.blocks)
+        value = None
+        if exc is None:
+            try:
+                value = import_value(inner.result())
+            except Exception as import_exc:
+                exc = import_exc
+            tracker = self._slots.memory_tracker
+            if isinstance(value, _Measured) and tracker is not None:
+                tracker.observe(job.node_id, value.peak_bytes)
+                value = value.value
+        # Free the slots before resolving so a woken coordinator can dispatch into them.
+        self._slots.release(job.resources)
+        if exc is not None:
+            job.future.set_exception(exc)
+        else:
+            job.future.set_result(value)
+
+    def submit(
+        self,
+        node_id: str,
+        fn: Callable[[], Any],
+        resources: NodeResources,
+        *,
+        attempt: int = 1,
+    ) -> JobHandle:
+        claim = self._slots.claim(node_id, resources)
+        with self.tracer.span("scheduler.acquire", node_id=node_id):
+            self._slots.acquire(claim)
+        return self._start(node_id, fn, claim, attempt)
+
+    def try_submit(
+        self,
+        node_id: str,
+        fn: Callable[[], Any],
+        resources: NodeResources,
+        *,
+        attempt: int = 1,
+    ) -> JobHandle | None:
+        claim = self._slots.claim(node_id, resources)
+        if not self._slots.try_acquire(claim):
+            return None
+        return self._start(node_id, fn, claim, attempt)
+
+    def capacity(self) -> NodeResources:
+        return self._slots.free()
+
+    def _start(
+        self, node_id: str, fn: Callable[[], Any], resources: NodeResources, attempt: int
+    ) -> JobHandle:
+        blocks: list[SharedMemory] = []
+        try:
+            with self.tracer.span("scheduler.shm_export", node_id=node_id):
+                call = export_call(fn, blocks, min_bytes=self._shm_min_bytes)
+        except Exception:
+            release_blocks(blocks)
+            self._slots.release(resources)
+            raise
+        future: Future[Any] = Future()
+        self._dispatch(
+            _ProcessJob(
+                node_id=node_id, call=call, future=future, blocks=blocks, resources=resources
+            )
+        )
         return JobHandle(
-            job_id=job_id,
+            job_id=f"process-{next(self._counter)}",
             node_id=node_id,
             future=future,
             resources=resources,
@@ -91,12 +543,10 @@ class LocalScheduler(Scheduler):
         )
 
     def wait_any(self, handles: Sequence[JobHandle], timeout_s: float | None = None) -> JobHandle:
-        futures = {handle.future: handle for handle in handles}
-        done, _ = wait(futures.keys(), return_when="FIRST_COMPLETED", timeout=timeout_s)
-        if not done:
-            raise SchedulerTimeoutError("Scheduler wait timed out.")
-        future = next(iter(done))
-        return futures[future]
+        return _wait_any(handles, timeout_s)
 
-    def shutdown(self) -> None:
-        self._executor.shutdown(wait=True)
+    def shutdown(self, *, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            pool = self._pool
+        pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import copy
 import itertools
+import math
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass
 from typing import Any
 
+import numpy as np
+
+from .dag import build_dag
 from .types import NodeSpec, PipelineStage, StageConfig
 
+SAMPLING_METHODS = ("random", "lhs")
+SWEEP_MODES = ("product", "zip")
+
 
 @dataclass(frozen=True, slots=True)
 class SweepSpec:
@@ -17,35 +26,224 @@ def _clone_stage(stage: PipelineStage[Any, StageConfig], cfg: StageConfig) -> Pi
     return stage.__class__(cfg)
 
 
-def expand_sweep(nodes: list[NodeSpec], sweep_specs: list[SweepSpec]) -> list[NodeSpec]:
-    """Expand parameter sweeps into cloned DAG nodes."""
-    nodes_by_id = {node.id: node for node in nodes}
-    sweep_ids = {s.node_id for s in sweep_specs}
-    expanded: list[NodeSpec] = [node for node in nodes if node.id not in sweep_ids]
+def _grid_points(spec: SweepSpec) -> list[dict[str, Any]]:
+    grid_items = sorted(spec.param_grid.items())
+    keys = [k for k, _ in grid_items]
+    values = [v for _, v in grid_items]
+    return [dict(zip(keys, combo, strict=True)) for combo in itertools.product(*values)]
 
-    for spec in sweep_specs:
-        base = nodes_by_id[spec.node_id]
-        if base.stage is None:
-            raise ValueError(f"Sweep node '{spec.node_id}' has no stage attached.")
-        grid_items = sorted(spec.param_grid.items())
-        keys = [k for k, _ in grid_items]
-        values = [v for _, v in grid_items]
-        for combo in itertools.product(*values):
-            updates = dict(zip(keys, combo))
-            cfg = base.stage.cfg.model_copy(update=updates)
-            stage = _clone_stage(base.stage, cfg)
-            suffix = "_".join(f"{k}-{v}" for k, v in updates.items())
-            node_id = f"{base.id}__{suffix}"
+
+def _suffix(updates: dict[str, Any]) -> str:
+    return "_".join(f"{k}-{v}" for k, v in updates.items())
+
+
+def expand_sweep(
+    nodes: list[NodeSpec],
+    sweep_specs: list[SweepSpec],
+    *,
+    batch_size: int | None = None,
+    mode: str = "product",
+) -> list[NodeSpec]:
+    """Expand parameter sweeps into cloned DAG nodes.
+
+    Each swept node is cloned once per grid point, and so is its downstream closure;
+    a clone's id appends the parameters it depends on (``"b__N-512"``). Nodes that
+    no swept node feeds are kept once and shared by every variant. With several
+    specs, ``mode="product"`` crosses their grids and ``mode="zip"`` pairs the i-th
+    points of each (the grids must then be the same size); a node is only cloned
+    per distinct combination of the specs upstream of it.
+
+    With ``batch_size``, ``DagExecutor`` runs up to that many variants of a swept node
+    that share their inputs as one ``PipelineStage.process_batch`` job; each variant
+    is still its own node with its own result, provenance and cache entry.
+    """
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    if mode not in SWEEP_MODES:
+        raise ValueError(f"Unsupported sweep mode: {mode}")
+    dag = build_dag(nodes)
+    specs = {spec.node_id: spec for spec in sweep_specs}
+    unknown = specs.keys() - dag.nodes_by_id.keys()
+    if unknown:
+        raise ValueError(f"Unknown sweep node ids: {sorted(unknown)}")
+    for node_id in specs:
+        if dag.nodes_by_id[node_id].stage is None:
+            raise ValueError(f"Sweep node '{node_id}' has no stage attached.")
+    swept = [node_id for node_id in dag.topo_order if node_id in specs]
+    grids = [_grid_points(specs[node_id]) for node_id in swept]
+    # Each joint point is a tuple of grid-point indices, one per swept node.
+    points: list[tuple[int, ...]]
+    if mode == "zip":
+        if len({len(grid) for grid in grids}) > 1:
+            raise ValueError("Zipped sweep grids must have the same number of points.")
+        points = [(i,) * len(grids) for i in range(len(grids[0]) if grids else 0)]
+    else:
+        points = list(itertools.product(*(range(len(grid)) for grid in grids)))
+    position = {node_id: pos for pos, node_id in enumerate(swept)}
+
+    # Swept nodes feeding each node (including itself), in topological order.
+    sources: dict[str, list[str]] = {}
+    for node_id in dag.topo_order:
+        upstream = {sid for dep in dag.deps[node_id] for sid in sources[dep]}
+        if node_id in specs:
+            upstream.add(node_id)
+        sources[node_id] = [sid for sid in swept if sid in upstream]
+
+    expanded: list[NodeSpec] = []
+    # (node id, projected point) -> clone id
+    clone_ids: dict[tuple[str, tuple[int, ...]], str] = {}
+    for node_id in dag.topo_order:
+        node = dag.nodes_by_id[node_id]
+        node_sources = sources[node_id]
+        if not node_sources:
+            expanded.append(node)
+            continue
+        positions = [position[sid] for sid in node_sources]
+        for point in points:
+            # Grid-point indices of its sources identify the variant of this node.
+            key = tuple(point[pos] for pos in positions)
+            if (node_id, key) in clone_ids:
+                continue
+            sweep_point = {swept[pos]: grids[pos][point[pos]] for pos in positions}
+            clone_id = f"{node_id}__" + "__".join(_suffix(u) for u in sweep_point.values())
+            clone_ids[(node_id, key)] = clone_id
+            deps = []
+            for dep in node.deps:
+                dep_key = tuple(point[position[sid]] for sid in sources[dep])
+                deps.append(clone_ids.get((dep, dep_key), dep))
+            stage = node.stage
+            metadata = {**node.metadata, "sweep_point": sweep_point}
+            if node_id in specs and stage is not None:
+                updates = sweep_point[node_id]
+                stage = _clone_stage(stage, stage.cfg.model_copy(update=updates))
+                metadata["sweep"] = updates
+                if batch_size is not None:
+                    # Only variants with the same inputs can share one batch job.
+                    group = "|".join([node_id, *deps])
+                    metadata["sweep_batch"] = {"group": group, "size": batch_size}
             expanded.append(
                 NodeSpec(
-                    id=node_id,
-                    deps=list(base.deps),
-                    op_name=base.op_name,
-                    version=base.version,
+                    id=clone_id,
+                    deps=deps,
+                    op_name=node.op_name,
+                    version=node.version,
                     stage=stage,
-                    resources=base.resources,
-                    metadata={**base.metadata, "sweep": updates},
+                    resources=node.resources,
+                    metadata=metadata,
                 )
             )
 
     return expanded
+
+
+class LazySweep:
+    """A parameter sweep over one node whose variants are built only when needed.
+
+    Variant ``i`` of ``spec.node_id`` gets the compact id ``"<node_id>#<i>"``; its
+    parameters are recovered with ``decode(i)`` from a per-key table of grid values
+    (the same order as ``expand_sweep``: the last sorted key varies fastest).
+    ``DagExecutor.run_sweep`` runs the upstream nodes once and the variants in
+    bounded windows, so memory does not grow with the grid size. The swept node
+    must be a sink.
+    """
+
+    def __init__(self, nodes: list[NodeSpec], spec: SweepSpec, *, batch_size: int | None = None):
+        nodes_by_id = {node.id: node for node in nodes}
+        base = nodes_by_id.get(spec.node_id)
+        if base is None:
+            raise ValueError(f"Unknown sweep node '{spec.node_id}'.")
+        if base.stage is None:
+            raise ValueError(f"Sweep node '{spec.node_id}' has no stage attached.")
+        if any(base.id in node.deps for node in nodes):
+            raise ValueError(f"Lazy sweep node '{base.id}' must not have dependents.")
+        if batch_size is not None and batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.base = base
+        self.stage: PipelineStage[Any, StageConfig] = base.stage
+        self.upstream = [node for node in nodes if node.id != base.id]
+        grid_items = sorted(spec.param_grid.items())
+        self.keys = tuple(key for key, _ in grid_items)
+        self.table = tuple(tuple(values) for _, values in grid_items)
+        self.batch_size = batch_size
+        # Config fields fixed for every variant, e.g. a fidelity level.
+        self.overrides: dict[str, Any] = {}
+
+    def with_overrides(self, **updates: Any) -> LazySweep:
+        """A copy of this sweep whose variants also set ``updates`` on their config."""
+        clone = copy.copy(self)
+        clone.overrides = {**self.overrides, **updates}
+        return clone
+
+    def __len__(self) -> int:
+        return math.prod(len(values) for values in self.table)
+
+    def decode(self, index: int) -> dict[str, Any]:
+        """Grid parameters of variant ``index``."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Sweep index {index} out of range.")
+        digits = []
+        for values in reversed(self.table):
+            index, digit = divmod(index, len(values))
+            digits.append(values[digit])
+        return dict(zip(self.keys, reversed(digits), strict=True))
+
+    def encode(self, digits: Sequence[int]) -> int:
+        """Variant index of the grid position ``digits`` (one value index per key)."""
+        index = 0
+        for digit, values in zip(digits, self.table, strict=True):
+            index = index * len(values) + digit
+        return index
+
+    def sample(self, n: int, *, method: str = "random", seed: int = 0) -> list[int]:
+        """Indices of up to ``n`` distinct variants, drawn without enumerating the grid.
+
+        ``"random"`` samples uniformly without replacement. ``"lhs"`` is a Latin
+        hypercube over the value indices of each key: every key's values are split
+        into ``n`` strata and each stratum is used once (duplicates are dropped when
+        a key has fewer than ``n`` values).
+        """
+        if method not in SAMPLING_METHODS:
+            raise ValueError(f"Unsupported sampling method: {method}")
+        rng = np.random.default_rng(seed)
+        n = min(n, len(self))
+        if method == "random":
+            return sorted(int(i) for i in rng.choice(len(self), size=n, replace=False))
+        columns = [
+            ((rng.permutation(n) + rng.random(n)) / n * len(values)).astype(int)
+            for values in self.table
+        ]
+        indices = (self.encode([int(c[row]) for c in columns]) for row in range(n))
+        return list(dict.fromkeys(indices))
+
+    def node_id(self, index: int) -> str:
+        return f"{self.base.id}#{index}"
+
+    def index_of(self, node_id: str) -> int:
+        prefix, _, index = node_id.rpartition("#")
+        if prefix != self.base.id:
+            raise ValueError(f"'{node_id}' is not a variant of '{self.base.id}'.")
+        return int(index)
+
+    def node(self, index: int) -> NodeSpec:
+        base = self.base
+        cfg = self.stage.cfg.model_copy(update={**self.decode(index), **self.overrides})
+        metadata = {**base.metadata, "sweep_index": index}
+        if self.batch_size is not None:
+            metadata["sweep_batch"] = {"group": base.id, "size": self.batch_size}
+        return NodeSpec(
+            id=self.node_id(index),
+            deps=list(base.deps),
+            op_name=base.op_name,
+            version=base.version,
+            stage=_clone_stage(self.stage, cfg),
+            resources=base.resources,
+            metadata=metadata,
+        )
+
+    def windows(self, size: int, variants: Sequence[int] | None = None) -> Iterator[list[NodeSpec]]:
+        """Variant nodes (all, or ``variants``) in order, ``size`` at a time."""
+        if size < 1:
+            raise ValueError("window must be at least 1.")
+        indices: Sequence[int] = range(len(self)) if variants is None else variants
+        for lo in range(0, len(indices), size):
+            yield [self.node(index) for index in indices[lo : lo + size]]
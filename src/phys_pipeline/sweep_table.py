@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+from .types import NodeSpec, StageResult
+
+_PARAM = "param."
+_METRIC = "metric."
+_VARIANT = "variant"
+
+
+def _load_column(file: Path, mmap_mode: Literal["r", "r+", "c"] | None) -> np.ndarray:
+    try:
+        return np.load(file, mmap_mode=mmap_mode, allow_pickle=True)
+    except ValueError:
+        # Object columns (mixed or missing parameter values) cannot be mapped.
+        return np.load(file, allow_pickle=True)
+
+
+def _upcast(column: np.ndarray, value: Any) -> np.ndarray:
+    try:
+        dtype = np.result_type(column.dtype, np.asarray(value).dtype)
+    except TypeError:
+        dtype = np.dtype(object)
+    return column if dtype == column.dtype else column.astype(dtype)
+
+
+class SweepTable:
+    """Columnar sweep outcomes: one NumPy array per parameter and metric.
+
+    Row ``i`` holds one variant: ``variant[i]`` is its index (``LazySweep`` index
+    or expansion order), ``params[name][i]`` its grid values and
+    ``metrics[name][i]`` its ``StageResult.metrics`` (NaN where a variant did not
+    report that metric). Rows are appended as variants finish; columns grow by
+    doubling, so appends are amortised O(1). ``save`` writes one ``.npy`` per
+    column, which ``load(..., mmap_mode="r")`` maps back without reading it all.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._variant = np.empty(max(capacity, 1), dtype=np.int64)
+        self._params: dict[str, np.ndarray] = {}
+        self._metrics: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def variant(self) -> np.ndarray:
+        return self._variant[: self._size]
+
+    @property
+    def params(self) -> dict[str, np.ndarray]:
+        return {name: column[: self._size] for name, column in self._params.items()}
+
+    @property
+    def metrics(self) -> dict[str, np.ndarray]:
+        return {name: column[: self._size] for name, column in self._metrics.items()}
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._variant)
+        self._variant = np.resize(self._variant, capacity)
+        for columns in (self._params, self._metrics):
+            for name, column in columns.items():
+                grown = np.empty(capacity, dtype=column.dtype)
+                grown[: len(column)] = column
+                columns[name] = grown
+
+    def _column(self, columns: dict[str, np.ndarray], name: str, value: Any) -> np.ndarray:
+        column = columns.get(name)
+        if column is None:
+            dtype = np.asarray(value).dtype if columns is self._params else np.dtype(np.float64)
+            column = np.empty(len(self._variant), dtype=dtype)
+            if dtype.kind == "f":
+                column[: self._size] = np.nan
+            elif self._size:
+                column = column.astype(object)
+                column[: self._size] = None
+        elif columns is self._params:
+            column = _upcast(column, value)
+        columns[name] = column
+        return column
+
+    def append(self, variant: int, params: Mapping[str, Any], metrics: Mapping[str, float]) -> None:
+        if self._size == len(self._variant):
+            self._grow()
+        row = self._size
+        self._variant[row] = variant
+        for name, value in params.items():
+            self._column(self._params, name, value)[row] = value
+        for name, value in metrics.items():
+            self._column(self._metrics, name, value)[row] = value
+        for columns, given in ((self._params, params), (self._metrics, metrics)):
+            for name, column in columns.items():
+                if name in given:
+                    continue
+                if column.dtype.kind == "f":
+                    column[row] = np.nan
+                    continue
+                if column.dtype != object:
+                    column = columns[name] = column.astype(object)
+                column[row] = None
+        self._size += 1
+
+    def append_result(
+        self, variant: int, params: Mapping[str, Any], result: StageResult[Any]
+    ) -> None:
+        self.append(variant, params, result.metrics)
+
+    @classmethod
+    def from_run(cls, nodes: list[NodeSpec], results: Mapping[str, StageResult[Any]]) -> SweepTable:
+        """Tabulate the swept nodes of an ``expand_sweep`` run, in expansion order."""
+        table = cls()
+        swept = [node for node in nodes if "sweep" in node.metadata]
+        for variant, node in enumerate(swept):
+            result = results.get(node.id)
+            if result is not None:
+                table.append_result(variant, node.metadata["sweep"], result)
+        return table
+
+    def best(self, metric: str, mode: str = "min") -> int:
+        """Row of the best ``metric`` value (NaNs ignored)."""
+        column = self.metrics[metric]
+        return int(np.nanargmin(column) if mode == "min" else np.nanargmax(column))
+
+    def row(self, index: int) -> dict[str, Any]:
+        return {
+            _VARIANT: int(self._variant[index]),
+            **{name: column[index] for name, column in self.params.items()},
+            **{name: column[index] for name, column in self.metrics.items()},
+        }
+
+    def _arrays(self) -> dict[str, np.ndarray]:
+        return {
+            _VARIANT: self.variant,
+            **{_PARAM + name: column for name, column in self.params.items()},
+            **{_METRIC + name: column for name, column in self.metrics.items()},
+        }
+
+    def save(self, path: Path | str) -> Path:
+        """Write the table: ``*.npz`` as one archive, otherwise a directory of ``.npy``."""
+        path = Path(path)
+        arrays = self._arrays()
+        if path.suffix == ".npz":
+            np.savez(path, **arrays)  # type: ignore[arg-type]
+            return path
+        path.mkdir(parents=True, exist_ok=True)
+        for name, column in arrays.items():
+            np.save(path / f"{name}.npy", column, allow_pickle=column.dtype == object)
+        return path
+
+    @classmethod
+    def load(
+        cls, path: Path | str, *, mmap_mode: Literal["r", "r+", "c"] | None = None
+    ) -> SweepTable:
+        """Read a saved table; ``mmap_mode`` maps ``.npy`` columns instead of reading them."""
+        path = Path(path)
+        if path.suffix == ".npz":
+            with np.load(path, allow_pickle=True) as archive:
+                arrays = {name: archive[name] for name in archive.files}
+        else:
+            arrays = {
+                file.stem: _load_column(file, mmap_mode) for file in sorted(path.glob("*.npy"))
+            }
+        table = cls.__new__(cls)
+        table._variant = arrays.pop(_VARIANT)
+        table._size = len(table._variant)
+        table._params = {k[len(_PARAM) :]: v for k, v in arrays.items() if k.startswith(_PARAM)}
+        table._metrics = {k[len(_METRIC) :]: v for k, v in arrays.items() if k.startswith(_METRIC)}
+        return table
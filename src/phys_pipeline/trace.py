@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, NamedTuple
+
+
+class Tracer:
+    """Opt-in recorder of monotonic per-node, per-thread spans.
+
+    Spans use ``time.perf_counter_ns`` so they can be compared across worker
+    threads (and, on Linux, worker processes on the same host). ``export``
+    writes Chrome Trace Event JSON that opens in ``chrome://tracing`` or Perfetto.
+    """
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    @contextmanager
+    def _span(self, name: str, node_id: str | None, args: dict[str, Any]) -> Iterator[None]:
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, start, time.perf_counter_ns(), node_id=node_id, **args)
+
+    def span(
+        self, name: str, *, node_id: str | None = None, **args: Any
+    ) -> AbstractContextManager[None]:
+        return self._span(name, node_id, args)
+
+    def add(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        *,
+        node_id: str | None = None,
+        pid: int | None = None,
+        tid: int | None = None,
+        **args: Any,
+    ) -> None:
+        if node_id is not None:
+            args["node_id"] = node_id
+        self.events.append(
+            {
+                "name": name,
+                "cat": name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1000.0,
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": pid if pid is not None else self._pid,
+                "tid": tid if tid is not None else threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def export(self, path: Path | str) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), default=str), encoding="utf-8")
+        return path
+
+
+_NULL_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+class NullTracer(Tracer):
+    """Disabled tracer: every call is a constant-time no-op."""
+
+    enabled = False
+
+    def span(
+        self, name: str, *, node_id: str | None = None, **args: Any
+    ) -> AbstractContextManager[None]:
+        return _NULL_SPAN
+
+    def add(self, name: str, start_ns: int, end_ns: int, **kwargs: Any) -> None:
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+class TimedValue(NamedTuple):
+    """Return value of ``timed_call``: the wrapped result plus where/when it ran."""
+
+    value: Any
+    start_ns: int
+    end_ns: int
+    pid: int
+    tid: int
+
+
+def timed_call(fn: Callable[[], Any]) -> TimedValue:
+    # Module-level so it can wrap calls sent to process-based schedulers.
+    start = time.perf_counter_ns()
+    value = fn()
+    return TimedValue(value, start, time.perf_counter_ns(), os.getpid(), threading.get_ident())
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import copy
+import functools
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+
+from .types import DagState, SimpleState, StageResult, State
+
+# Arrays smaller than this are cheaper to pickle than to map.
+SHM_MIN_BYTES = 1 << 16
+
+
+@dataclass(frozen=True, slots=True)
+class SharedArrayRef:
+    """Placeholder for an ndarray that lives in a shared-memory block."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: np.dtype[Any]
+
+
+def _export_array(a: Any, blocks: list[shared_memory.SharedMemory], min_bytes: int) -> Any:
+    if not isinstance(a, np.ndarray) or a.dtype.hasobject or a.nbytes < min_bytes:
+        return a
+    shm = shared_memory.SharedMemory(create=True, size=max(a.nbytes, 1))
+    dst: np.ndarray = np.ndarray(a.shape, dtype=a.dtype, buffer=shm.buf)
+    np.copyto(dst, a)
+    del dst
+    blocks.append(shm)
+    return SharedArrayRef(name=shm.name, shape=a.shape, dtype=a.dtype)
+
+
+def _import_array(ref: Any, *, unlink: bool) -> Any:
+    if not isinstance(ref, SharedArrayRef):
+        return ref
+    shm = shared_memory.SharedMemory(name=ref.name)
+    try:
+        view: np.ndarray = np.ndarray(ref.shape, dtype=ref.dtype, buffer=shm.buf)
+        out = view.copy()
+        del view
+    finally:
+        shm.close()
+        if unlink:
+            shm.unlink()
+    return out
+
+
+def export_state(
+    state: State,
+    blocks: list[shared_memory.SharedMemory],
+    *,
+    min_bytes: int = SHM_MIN_BYTES,
+) -> State:
+    """Return a shallow copy of ``state`` with large arrays moved to shared memory.
+
+    Only ``SimpleState`` payload/meta arrays and ``DagState`` inputs are
+    rewritten; other ``State`` types are returned unchanged and pickled as usual.
+    Created blocks are appended to ``blocks`` so the caller controls their lifetime.
+    """
+    if isinstance(state, DagState):
+        return DagState(
+            {k: export_state(v, blocks, min_bytes=min_bytes) for k, v in state.inputs.items()}
+        )
+    if isinstance(state, SimpleState):
+        clone = copy.copy(state)
+        clone.payload = _export_array(state.payload, blocks, min_bytes)
+        clone.meta = {k: _export_array(v, blocks, min_bytes) for k, v in state.meta.items()}
+        return clone
+    return state
+
+
+def import_state(state: State, *, unlink: bool = False) -> State:
+    """Inverse of ``export_state``: copy shared arrays back into private memory."""
+    if isinstance(state, DagState):
+        return DagState({k: import_state(v, unlink=unlink) for k, v in state.inputs.items()})
+    if isinstance(state, SimpleState):
+        clone = copy.copy(state)
+        clone.payload = _import_array(state.payload, unlink=unlink)
+        clone.meta = {k: _import_array(v, unlink=unlink) for k, v in state.meta.items()}
+        return clone
+    return state
+
+
+def _map_value(value: Any, fn: Callable[[State], State]) -> Any:
+    if isinstance(value, State):
+        return fn(value)
+    if isinstance(value, functools.partial):
+        args = [_map_value(a, fn) for a in value.args]
+        kwargs = {k: _map_value(v, fn) for k, v in value.keywords.items()}
+        return functools.partial(value.func, *args, **kwargs)
+    if isinstance(value, list):
+        return [_map_value(v, fn) for v in value]
+    if isinstance(value, tuple):
+        items = [_map_value(v, fn) for v in value]
+        make = getattr(type(value), "_make", None)
+        return make(items) if make is not None else tuple(items)
+    if isinstance(value, StageResult):
+        return StageResult(
+            state=fn(value.state),
+            metrics=value.metrics,
+            artifacts=value.artifacts,
+            provenance=value.provenance,
+        )
+    return value
+
+
+def export_call(
+    fn: Callable[[], Any],
+    blocks: list[shared_memory.SharedMemory],
+    *,
+    min_bytes: int = SHM_MIN_BYTES,
+) -> Callable[[], Any]:
+    """Move ``State`` arguments of (nested) ``functools.partial`` calls into shared memory."""
+    mapped: Callable[[], Any] = _map_value(
+        fn, lambda s: export_state(s, blocks, min_bytes=min_bytes)
+    )
+    return mapped
+
+
+def import_call(fn: Callable[[], Any]) -> Callable[[], Any]:
+    mapped: Callable[[], Any] = _map_value(fn, import_state)
+    return mapped
+
+
+def export_value(value: Any, *, min_bytes: int = SHM_MIN_BYTES) -> Any:
+    """Export a return value from a worker; blocks are closed but not unlinked."""
+    blocks: list[shared_memory.SharedMemory] = []
+    out = _map_value(value, lambda s: export_state(s, blocks, min_bytes=min_bytes))
+    for shm in blocks:
+        shm.close()
+    return out
+
+
+def import_value(value: Any) -> Any:
+    """Import a worker return value and unlink the blocks it referenced."""
+    return _map_value(value, lambda s: import_state(s, unlink=True))
+
+
+def release_blocks(blocks: list[shared_memory.SharedMemory]) -> None:
+    for shm in blocks:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+    blocks.clear()
@@ -10,6 +10,7 @@ from typing import Any, Generic, TypeVar
 import numpy as np
 from pydantic import BaseModel, Field
 
+from .hashing import hash_ndarray as hash_ndarray
 from .policy import PolicyBag
 
 #                                                                Data types
@@ -50,13 +51,37 @@ class PipelineStage(ABC, Generic[S, C]):
         """Pure transform: no global side effects, deterministic."""
         ...
 
+    def process_batch(
+        self, states: list[S], cfgs: list[C], *, policy: PolicyBag | None = None
+    ) -> list[StageResult[S]]:
+        """Run the stage once per ``(state, cfg)`` pair and return results in order.
+
+        ``DagExecutor`` calls this for sweep variants expanded with
+        ``expand_sweep(..., batch_size=...)``. Override it to evaluate the whole
+        batch in one vectorized call; the default loops over ``process``.
+        """
+        return [
+            type(self)(cfg).process(state, policy=policy)
+            for state, cfg in zip(states, cfgs, strict=True)
+        ]
+
     # Optional methods to aid scheduler
     def estimated_cost(self) -> float:
         return 1.0
 
     def can_parallelize_over(self) -> str | None:
+        # "payload" or a meta key; DagExecutor splits the state along it and runs
+        # the chunks concurrently (see ``phys_pipeline.parallel.split_state``).
         return None  # key for internal parallelism, if possible (ex: ray)
 
+    def reduce_metrics(self, metrics: list[dict[str, float]]) -> dict[str, float]:
+        """Combine per-chunk metrics of a split node; sums each key by default."""
+        reduced: dict[str, float] = {}
+        for chunk_metrics in metrics:
+            for key, value in chunk_metrics.items():
+                reduced[key] = reduced.get(key, 0.0) + float(value)
+        return reduced
+
 
 # --- PipelineStage I/O ---
 
@@ -101,15 +126,6 @@ class State(ABC):
     def hashable_repr(self) -> bytes: ...
 
 
-def hash_ndarray(a: np.ndarray) -> bytes:
-    a = np.ascontiguousarray(a)
-    h = hashlib.sha256()
-    h.update(str(a.dtype).encode())
-    h.update(str(a.shape).encode())
-    h.update(a.data)
-    return h.digest()
-
-
 def hash_small(obj: Any) -> bytes:
     try:
         payload = json.dumps(obj, sort_keys=True, default=str).encode()
@@ -159,6 +175,16 @@ class DagState(State):
         return h.digest()
 
 
+def state_nbytes(state: State) -> int:
+    """Bytes held by NumPy arrays in a state (0 for opaque ``State`` types)."""
+    if isinstance(state, DagState):
+        return sum(state_nbytes(s) for s in state.inputs.values())
+    if isinstance(state, SimpleState):
+        values = [state.payload, *state.meta.values()]
+        return sum(v.nbytes for v in values if isinstance(v, np.ndarray))
+    return 0
+
+
 # --- DAG utility --- WIP
 
 
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.sweep import LazySweep, SweepSpec
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class FitConfig(StageConfig):
+    x: float = 0.0
+    y: float = 0.0
+    steps: int = 1
+
+
+class FitStage(PipelineStage[SimpleState, FitConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        # Low-fidelity runs are biased upward but preserve the ranking.
+        loss = (self.cfg.x - 0.3) ** 2 + 0.01 / self.cfg.steps
+        return StageResult(state=state, metrics={"loss": loss})
+
+
+def _sweep(xs: list[float]) -> LazySweep:
+    base = NodeSpec(id="fit", stage=FitStage(FitConfig()))
+    return LazySweep([base], SweepSpec(node_id="fit", param_grid={"x": xs}))
+
+
+def test_sample_random_and_latin_hypercube():
+    base = NodeSpec(id="fit", stage=FitStage(FitConfig()))
+    grid = {"x": list(range(10)), "y": list(range(10))}
+    sweep = LazySweep([base], SweepSpec(node_id="fit", param_grid=grid))
+
+    random_ids = sweep.sample(5, seed=1)
+    assert len(set(random_ids)) == 5 and all(0 <= i < 100 for i in random_ids)
+
+    points = [sweep.decode(i) for i in sweep.sample(5, method="lhs", seed=1)]
+    # One point per stratum of width 2 along each key.
+    assert sorted(p["x"] // 2 for p in points) == [0, 1, 2, 3, 4]
+    assert sorted(p["y"] // 2 for p in points) == [0, 1, 2, 3, 4]
+    assert sweep.sample(500) == list(range(100))
+
+
+def test_successive_halving_finds_best_with_fewer_runs():
+    sweep = _sweep([i / 20 for i in range(21)])
+    result = DagExecutor().run_halving(
+        SimpleState(), sweep, metric="loss", fidelity="steps", budgets=[1, 3, 9]
+    )
+
+    assert result.params == {"x": 0.3}
+    assert [len(rung) for rung in result.rungs] == [21, 7, 2]
+    assert result.executions == 30
+
+
+def test_halving_threshold_stops_variants_early():
+    sweep = _sweep([i / 20 for i in range(21)])
+    result = DagExecutor().run_halving(
+        SimpleState(), sweep, metric="loss", fidelity="steps", budgets=[1, 9], threshold=0.1
+    )
+
+    assert result.params == {"x": 0.3}
+    assert all(sweep.decode(i)["x"] < 0.65 for i in result.rungs[0])
+
+
+def test_hyperband_matches_exhaustive_best():
+    sweep = _sweep([i / 10 for i in range(9)])
+    result = DagExecutor().run_hyperband(
+        SimpleState(), sweep, metric="loss", fidelity="steps", budgets=[1, 3, 9]
+    )
+
+    assert result.params == {"x": 0.3}
+    assert result.score == (0.3 - 0.3) ** 2 + 0.01 / 9
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pytest
 
-from phys_pipeline.dag import PipelineGraph, build_dag
+from phys_pipeline.dag import PipelineGraph, ancestors, build_dag, descendants
 from phys_pipeline.errors import PipelineError
 from phys_pipeline.types import NodeSpec
 
@@ -30,6 +30,26 @@ def test_pipeline_graph_from_nodes():
     assert graph.dag.topo_order == ["a", "b"]
 
 
+def test_pipeline_graph_compiles_csr_adjacency_and_levels():
+    nodes = [
+        NodeSpec(id="d", deps=["b", "c"]),
+        NodeSpec(id="c", deps=["a"]),
+        NodeSpec(id="b", deps=["a"]),
+        NodeSpec(id="a"),
+    ]
+    graph = PipelineGraph.from_nodes(nodes)
+    assert graph.ids == ["a", "b", "c", "d"]
+    assert graph.dep_ptr.tolist() == [0, 0, 1, 2, 4]
+    assert graph.dep_idx.tolist() == [0, 0, 1, 2]
+    assert graph.dependent_ptr.tolist() == [0, 2, 3, 4, 4]
+    assert graph.dependent_idx.tolist() == [1, 2, 3, 3]
+    assert graph.in_degree.tolist() == [0, 1, 1, 2]
+    assert graph.out_degree.tolist() == [2, 1, 1, 0]
+    assert graph.levels.tolist() == [0, 1, 1, 2]
+    assert graph.depth == 3
+    assert graph.level(1) == ["b", "c"]
+
+
 def test_build_dag_duplicate_ids():
     nodes = [
         NodeSpec(id="a", deps=[]),
@@ -57,3 +77,17 @@ def test_build_dag_cycle_detection():
 
     with pytest.raises(PipelineError, match="Cycle detected"):
         build_dag(nodes)
+
+
+def test_ancestors_and_descendants():
+    dag = build_dag(
+        [
+            NodeSpec(id="a"),
+            NodeSpec(id="b", deps=["a"]),
+            NodeSpec(id="c", deps=["b"]),
+            NodeSpec(id="d", deps=["a"]),
+        ]
+    )
+    assert ancestors(dag, ["c"]) == {"a", "b"}
+    assert descendants(dag, ["a"]) == {"b", "c", "d"}
+    assert descendants(dag, ["c"]) == set()
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import os
 import time
 
+import numpy as np
 import pytest
 
+from phys_pipeline.cache import DiskCache
+from phys_pipeline.cancellation import cancel_token
+from phys_pipeline.dag_cache import DagCache
+from phys_pipeline.errors import SchedulerRetryError, SchedulerTimeoutError, StageContractError
 from phys_pipeline.executor import DagExecutor, RetryPolicy
-from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.scheduler import LocalScheduler, ProcessScheduler
 from phys_pipeline.types import (
     DagState,
     NodeResources,
@@ -34,6 +40,16 @@ class MergeStage(PipelineStage[DagState, StageConfig]):
         return StageResult(state=SimpleState(payload=total))
 
 
+class SleepConfig(StageConfig):
+    seconds: float = 0.0
+
+
+class SleepStage(PipelineStage[SimpleState, SleepConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        time.sleep(self.cfg.seconds)
+        return StageResult(state=state)
+
+
 class FailOnceStage(PipelineStage[SimpleState, StageConfig]):
     def __init__(self, cfg: StageConfig):
         super().__init__(cfg)
@@ -86,6 +102,37 @@ def test_dag_executor_timeout_policy():
         executor.run(SimpleState(payload=1), nodes)
 
 
+def test_dag_executor_timeout_does_not_wait_for_hung_stage():
+    nodes = [NodeSpec(id="hung", stage=SleepStage(SleepConfig(seconds=2.0)))]
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=1, max_cpu=1),
+        retry_policy=RetryPolicy(max_retries=0, timeout_s=0.2),
+    )
+    start = time.monotonic()
+    with pytest.raises(SchedulerTimeoutError):
+        executor.run(SimpleState(payload=1), nodes)
+    assert time.monotonic() - start < 1.0
+
+
+def test_dag_executor_timeout_is_not_reset_by_retry_wakeups():
+    class AlwaysFailStage(PipelineStage[SimpleState, StageConfig]):
+        def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+            raise RuntimeError("flaky")
+
+    nodes = [
+        NodeSpec(id="hung", stage=SleepStage(SleepConfig(seconds=2.0))),
+        NodeSpec(id="flaky", stage=AlwaysFailStage(StageConfig())),
+    ]
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=2, max_cpu=2),
+        retry_policy=RetryPolicy(max_retries=1000, timeout_s=0.3, backoff_s=0.05),
+    )
+    start = time.monotonic()
+    with pytest.raises(SchedulerTimeoutError):
+        executor.run(SimpleState(payload=1), nodes)
+    assert time.monotonic() - start < 1.0
+
+
 def test_dag_executor_mpi_runner():
     class MockRunner:
         def __init__(self):
@@ -110,3 +157,306 @@ def test_dag_executor_mpi_runner():
     result = executor.run(SimpleState(payload=0), nodes)
     assert result.results["a"].state.payload == 1
     assert runner.calls == 1
+
+
+def test_dag_executor_with_process_scheduler():
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=3))),
+        NodeSpec(id="d", deps=["b", "c"], stage=MergeStage(StageConfig())),
+    ]
+    executor = DagExecutor(scheduler=ProcessScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(SimpleState(payload=np.zeros(32_768)), nodes)
+
+    np.testing.assert_array_equal(result.results["d"].state.payload, np.full(32_768, 7.0))
+
+
+class ContractBreakingStage(PipelineStage[SimpleState, StageConfig]):
+    def __init__(self, cfg: StageConfig):
+        super().__init__(cfg)
+        self.calls = 0
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        self.calls += 1
+        raise StageContractError("bad metrics")
+
+
+def test_retry_policy_backoff_schedule():
+    policy = RetryPolicy(backoff_s=1.0, backoff_factor=2.0, max_backoff_s=3.0)
+    assert [policy.delay_s(n) for n in (1, 2, 3)] == [1.0, 2.0, 3.0]
+    jittered = RetryPolicy(backoff_s=1.0, jitter=0.5)
+    assert all(0.5 <= jittered.delay_s(1) <= 1.5 for _ in range(20))
+
+
+def test_dag_executor_does_not_retry_deterministic_errors():
+    stage = ContractBreakingStage(StageConfig())
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=1, max_cpu=1),
+        retry_policy=RetryPolicy(max_retries=3),
+    )
+    with pytest.raises(SchedulerRetryError):
+        executor.run(SimpleState(payload=1), [NodeSpec(id="a", stage=stage)])
+    assert stage.calls == 1
+
+
+def test_dag_executor_per_node_retry_override():
+    nodes = [
+        NodeSpec(
+            id="a",
+            stage=FailOnceStage(StageConfig()),
+            metadata={"retry_policy": {"max_retries": 1}},
+        )
+    ]
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1))
+    result = executor.run(SimpleState(payload=1), nodes)
+    assert result.provenance["node_runs"][0]["attempts"] == 2
+
+
+def test_dag_executor_retry_backoff_does_not_block_other_nodes():
+    nodes = [
+        NodeSpec(id="flaky", stage=FailOnceStage(StageConfig())),
+        NodeSpec(id="b", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="c", deps=["b"], stage=AddStage(AddConfig(amount=1))),
+    ]
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=2, max_cpu=2),
+        retry_policy=RetryPolicy(max_retries=1, backoff_s=0.3),
+    )
+    start = time.time()
+    result = executor.run(SimpleState(payload=0), nodes)
+    runs = {run["node_id"]: run for run in result.provenance["node_runs"]}
+    assert runs["c"]["finished_at"] - start < 0.2
+    assert runs["flaky"]["finished_at"] - start >= 0.3
+
+
+def test_dag_executor_releases_consumed_intermediates():
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="c", deps=["b"], stage=AddStage(AddConfig(amount=1))),
+    ]
+    payload = np.zeros(1024)
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1))
+    result = executor.run(SimpleState(payload=payload), nodes, release_intermediates=True)
+
+    assert set(result.results) == {"c"}
+    np.testing.assert_array_equal(result.results["c"].state.payload, payload + 3)
+    # A node's input stays live until the node finishes, so two states overlap.
+    assert result.metrics["executor.peak_retained_bytes"] == 2 * payload.nbytes
+    assert result.execution_order == ["a", "b", "c"]
+
+
+def test_dag_executor_counts_preloaded_recipe_hits_as_retained(tmp_path):
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+    ]
+    payload = np.zeros(1024)
+    cache = DagCache(DiskCache(tmp_path))
+    DagExecutor(cache=cache, key_mode="recipe").run(SimpleState(payload=payload), nodes)
+    warm = DagExecutor(cache=cache, key_mode="recipe").run(
+        SimpleState(payload=payload), nodes, keep=()
+    )
+    assert warm.metrics["executor.peak_retained_bytes"] == 2 * payload.nbytes
+
+
+def test_dag_executor_keep_selects_retained_outputs():
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+    ]
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(SimpleState(payload=0), nodes, keep={"a", "c"})
+    assert set(result.results) == {"a", "c"}
+    assert result.results["c"].state.payload == 3
+
+    with pytest.raises(ValueError, match="Unknown node ids"):
+        DagExecutor().run(SimpleState(payload=0), nodes, keep={"missing"})
+
+
+def _branching_nodes():
+    return [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=3))),
+        NodeSpec(id="d", deps=["b", "c"], stage=MergeStage(StageConfig())),
+        NodeSpec(id="e", deps=["c"], stage=AddStage(AddConfig(amount=5))),
+    ]
+
+
+def test_dag_executor_targets_run_ancestor_closure_only():
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(SimpleState(payload=0), _branching_nodes(), targets=["b"])
+    assert sorted(result.execution_order) == ["a", "b"]
+    assert result.results["b"].state.payload == 3
+
+
+def test_dag_executor_stop_at_excludes_descendants():
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(SimpleState(payload=0), _branching_nodes(), stop_at=["c"])
+    assert sorted(result.execution_order) == ["a", "b", "c"]
+
+
+def test_dag_executor_rejects_targets_cut_by_stop_at():
+    executor = DagExecutor()
+    with pytest.raises(ValueError, match="downstream of stop_at"):
+        executor.run(SimpleState(payload=0), _branching_nodes(), targets=["e"], stop_at=["a"])
+    with pytest.raises(ValueError, match="at least one node"):
+        executor.run(SimpleState(payload=0), _branching_nodes(), targets=[])
+
+
+def test_dag_executor_start_from_supplied_state():
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1))
+    result = executor.run(
+        SimpleState(payload=0),
+        _branching_nodes(),
+        targets=["e"],
+        start_from={"c": SimpleState(payload=10)},
+    )
+    assert result.execution_order == ["c", "e"]
+    assert result.results["e"].state.payload == 15
+    assert result.provenance["node_runs"][0]["seeded"]
+
+
+def test_dag_executor_start_from_cache_entry(tmp_path):
+    cache = DagCache(DiskCache(tmp_path))
+
+    def executor():
+        return DagExecutor(
+            scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache, key_mode="recipe"
+        )
+
+    executor().run(SimpleState(payload=0), _branching_nodes(), targets=["c"])
+    result = executor().run(
+        SimpleState(payload=0), _branching_nodes(), targets=["e"], start_from=["c"]
+    )
+    assert result.execution_order == ["c", "e"]
+    assert result.results["e"].state.payload == 9
+
+    with pytest.raises(ValueError, match="key_mode='recipe'"):
+        DagExecutor().run(SimpleState(payload=0), _branching_nodes(), start_from=["c"])
+
+
+def test_dag_executor_run_iter_streams_completions():
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    events = executor.run_iter(SimpleState(payload=0), _branching_nodes(), keep=())
+    seen = {}
+    while True:
+        try:
+            node_id, result, record = next(events)
+        except StopIteration as stop:
+            final = stop.value
+            break
+        assert record.node_id == node_id
+        seen[node_id] = result.state.payload
+
+    assert seen == {"a": 1, "b": 3, "c": 4, "d": 7, "e": 9}
+    assert final.results == {}
+    assert final.execution_order == list(seen)
+
+
+def test_dag_executor_run_iter_yields_cache_hits(tmp_path):
+    cache = DagCache(DiskCache(tmp_path))
+    nodes = _branching_nodes()
+    DagExecutor(cache=cache).run(SimpleState(payload=0), nodes)
+    events = list(DagExecutor(cache=cache).run_iter(SimpleState(payload=0), nodes))
+    assert len(events) == len(nodes)
+    assert all(event.provenance.cache_hit for event in events)
+
+
+def test_dag_executor_run_iter_yields_hits_before_slow_nodes_finish(tmp_path):
+    cache = DagCache(DiskCache(tmp_path))
+    cached = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+    ]
+    DagExecutor(cache=cache).run(SimpleState(payload=0), cached)
+    slow = NodeSpec(id="slow", stage=SleepStage(SleepConfig(seconds=0.6)))
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2), cache=cache)
+    start = time.monotonic()
+    arrivals = {
+        event.node_id: time.monotonic() - start
+        for event in executor.run_iter(SimpleState(payload=0), [slow, *cached])
+    }
+    assert arrivals["b"] < 0.3 <= arrivals["slow"]
+
+
+class AlwaysFailStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        raise RuntimeError(f"{self.cfg.name} failed")
+
+
+class CooperativeStage(PipelineStage[SimpleState, StageConfig]):
+    observed: list[str] = []
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        token = cancel_token(policy)
+        for _ in range(200):
+            if token.cancelled:
+                CooperativeStage.observed.append("cancelled")
+                token.raise_if_cancelled()
+            time.sleep(0.01)
+        return StageResult(state=state)
+
+
+def test_fail_fast_cancels_running_stages():
+    CooperativeStage.observed.clear()
+    nodes = [
+        NodeSpec(id="long", stage=CooperativeStage(StageConfig())),
+        NodeSpec(id="pause", stage=SleepStage(SleepConfig(seconds=0.1))),
+        NodeSpec(id="bad", deps=["pause"], stage=AlwaysFailStage(StageConfig(name="bad"))),
+        NodeSpec(id="after", deps=["bad"], stage=AddStage(AddConfig())),
+    ]
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    start = time.monotonic()
+    with pytest.raises(SchedulerRetryError, match="bad failed"):
+        executor.run(SimpleState(payload=0), nodes)
+    assert time.monotonic() - start < 1.0
+    deadline = time.monotonic() + 1.0
+    while not CooperativeStage.observed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert CooperativeStage.observed == ["cancelled"]
+
+
+def test_keep_going_runs_independent_branches():
+    nodes = _branching_nodes()
+    nodes[1] = NodeSpec(id="b", deps=["a"], stage=AlwaysFailStage(StageConfig(name="b")))
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=2, max_cpu=2), on_error="keep_going"
+    )
+    result = executor.run(SimpleState(payload=0), nodes)
+    assert not result.ok
+    assert result.failures == {"b": "b failed"}
+    assert result.blocked == ["d"]
+    assert sorted(result.execution_order) == ["a", "c", "e"]
+    assert result.results["e"].state.payload == 9
+    errors = {run["node_id"]: run["error"] for run in result.provenance["node_runs"]}
+    assert errors["b"] == "b failed"
+
+
+class PidStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=SimpleState(payload=os.getpid()))
+
+
+def test_executor_context_keeps_worker_pool_warm_across_runs():
+    nodes = [NodeSpec(id="pid", stage=PidStage(StageConfig()))]
+    scheduler = ProcessScheduler(max_workers=1, max_cpu=1)
+    with DagExecutor(scheduler=scheduler) as executor:
+        first = executor.run(SimpleState(), nodes).results["pid"].state.payload
+        second = executor.run(SimpleState(), nodes).results["pid"].state.payload
+    assert first == second != os.getpid()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late", int, NodeResources())
+
+
+def test_failed_run_leaves_warm_executor_usable():
+    failing = [NodeSpec(id="bad", stage=AlwaysFailStage(StageConfig(name="bad")))]
+    with DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2)) as executor:
+        with pytest.raises(SchedulerRetryError, match="bad failed"):
+            executor.run(SimpleState(payload=0), failing)
+        result = executor.run(SimpleState(payload=0), _branching_nodes())
+    assert result.results["e"].state.payload == 9
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import time
+
+import numpy as np
+import pytest
+
 from phys_pipeline.cache import DiskCache
-from phys_pipeline.dag_cache import DagCache
+from phys_pipeline.dag_cache import AsyncDagCache, DagCache
 from phys_pipeline.executor import DagExecutor
 from phys_pipeline.scheduler import LocalScheduler
 from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
@@ -36,3 +41,200 @@ def test_dag_integration_cache_hit(tmp_path):
     assert second.results["a"].state.payload == 3
     node_runs = second.provenance.get("node_runs", [])
     assert any(run.get("cache_hit") for run in node_runs)
+
+
+class CountingState(SimpleState):
+    hash_calls = 0
+
+    def hashable_repr(self) -> bytes:
+        CountingState.hash_calls += 1
+        return super().hashable_repr()
+
+
+class CountingAddStage(PipelineStage[SimpleState, AddConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=CountingState(payload=state.payload + self.cfg.amount))
+
+
+def test_dag_cache_hashes_each_output_once(tmp_path):
+    cache = DagCache(DiskCache(tmp_path))
+    nodes = [
+        NodeSpec(id="a", stage=CountingAddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="d", deps=["a"], stage=AddStage(AddConfig(amount=3))),
+    ]
+    CountingState.hash_calls = 0
+    DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache).run(
+        SimpleState(payload=0), nodes
+    )
+    # b, c and d deep-copy a's CountingState, so four outputs are each hashed once.
+    assert CountingState.hash_calls == 4
+
+    CountingState.hash_calls = 0
+    warm = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache).run(
+        SimpleState(payload=0), nodes
+    )
+    assert CountingState.hash_calls == 0
+    assert all(run["cache_hit"] for run in warm.provenance["node_runs"])
+
+
+class CountingBackend(DiskCache):
+    def __init__(self, root):
+        super().__init__(root)
+        self.gets = 0
+
+    def get(self, key):
+        self.gets += 1
+        return super().get(key)
+
+
+def _chain_nodes():
+    return [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["b"], stage=AddStage(AddConfig(amount=3))),
+    ]
+
+
+def test_recipe_keys_skip_cached_ancestors(tmp_path):
+    backend = CountingBackend(tmp_path)
+    cache = DagCache(backend)
+
+    def executor():
+        return DagExecutor(
+            scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache, key_mode="recipe"
+        )
+
+    cold = executor().run(SimpleState(payload=0), _chain_nodes())
+    assert cold.results["c"].state.payload == 6
+    assert executor().plan(SimpleState(payload=0), _chain_nodes()).status == {
+        "a": "skip",
+        "b": "skip",
+        "c": "hit",
+    }
+
+    backend.gets = 0
+    warm = executor().run(SimpleState(payload=0), _chain_nodes())
+    assert backend.gets == 1
+    assert warm.execution_order == ["c"]
+    assert warm.results["c"].state.payload == 6
+    assert warm.provenance["cache_plan"] == {"hit": 1, "run": 0, "skip": 2}
+
+
+def test_recipe_plan_reruns_only_missing_suffix(tmp_path):
+    cache = DagCache(DiskCache(tmp_path))
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache, key_mode="recipe"
+    )
+    nodes = _chain_nodes()
+    executor.run(SimpleState(payload=0), nodes[:2])
+
+    plan = executor.plan(SimpleState(payload=0), nodes)
+    assert plan.hits == ["b"]
+    assert plan.runs == ["c"]
+    assert plan.skipped == ["a"]
+
+    rerun = DagExecutor(
+        scheduler=LocalScheduler(max_workers=1, max_cpu=1), cache=cache, key_mode="recipe"
+    ).run(SimpleState(payload=0), nodes)
+    assert rerun.execution_order == ["b", "c"]
+    assert rerun.results["c"].state.payload == 6
+
+
+class SlowBackend(DiskCache):
+    def __init__(self, root, delay_s=0.1):
+        super().__init__(root)
+        self.delay_s = delay_s
+
+    def put(self, key, meta, arrays, *, ttl_s=None):
+        time.sleep(self.delay_s)
+        super().put(key, meta, arrays, ttl_s=ttl_s)
+
+
+def test_async_dag_cache_writes_behind_and_serves_pending(tmp_path):
+    backend = SlowBackend(tmp_path)
+    with AsyncDagCache(backend) as cache:
+        start = time.perf_counter()
+        cache.put("k", StageResult(state=SimpleState(payload=5), metrics={"m": 1.0}))
+        assert time.perf_counter() - start < backend.delay_s
+        assert not backend.exists("k")
+        assert cache.exists("k")
+        assert cache.get("k").state.payload == 5
+        cache.flush()
+        assert backend.exists("k")
+    assert DagCache(backend).get("k").metrics == {"m": 1.0}
+
+
+def test_async_dag_cache_applies_backpressure(tmp_path):
+    backend = SlowBackend(tmp_path, delay_s=0.05)
+    cache = AsyncDagCache(backend, max_writers=1, max_pending_bytes=1024)
+    payload = np.zeros(128)  # 1 KiB: a second put must wait for the first write
+    start = time.perf_counter()
+    cache.put("a", StageResult(state=SimpleState(payload=payload)))
+    cache.put("b", StageResult(state=SimpleState(payload=payload)))
+    assert time.perf_counter() - start >= 0.05
+    cache.close()
+    assert backend.exists("a") and backend.exists("b")
+
+
+def test_dag_executor_with_async_cache(tmp_path):
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=3))),
+    ]
+    with AsyncDagCache(SlowBackend(tmp_path, delay_s=0.01)) as cache:
+        DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2), cache=cache).run(
+            SimpleState(payload=0), nodes
+        )
+        cache.flush()
+        warm = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2), cache=cache).run(
+            SimpleState(payload=0), nodes
+        )
+    assert all(run["cache_hit"] for run in warm.provenance["node_runs"])
+    assert warm.results["c"].state.payload == 4
+
+
+class ManyCountingCache(DagCache):
+    def __init__(self, backend):
+        super().__init__(backend)
+        self.batches = []
+
+    def get_many(self, keys):
+        self.batches.append(len(keys))
+        return super().get_many(keys)
+
+
+def test_recipe_probes_are_batched_per_wave(tmp_path):
+    nodes = [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(amount=3))),
+    ]
+    cache = ManyCountingCache(DiskCache(tmp_path))
+    DagExecutor(cache=cache, key_mode="recipe").run(SimpleState(payload=0), nodes)
+    assert cache.batches == [2, 1]  # sinks b, c together, then their dependency a
+
+
+class FailingBackend(DiskCache):
+    def put(self, key, meta, arrays, *, ttl_s=None):
+        raise OSError("disk full")
+
+
+def test_dag_executor_surfaces_write_behind_errors(tmp_path):
+    nodes = [NodeSpec(id="a", stage=AddStage(AddConfig(amount=1)))]
+    with AsyncDagCache(FailingBackend(tmp_path)) as cache:
+        with pytest.raises(OSError, match="disk full"):
+            DagExecutor(cache=cache).run(SimpleState(payload=0), nodes)
+
+
+def test_async_dag_cache_budgets_non_array_states(tmp_path):
+    backend = SlowBackend(tmp_path, delay_s=0.05)
+    cache = AsyncDagCache(backend, max_writers=1, max_pending_bytes=1024)
+    payload = list(range(1000))
+    start = time.perf_counter()
+    cache.put("a", StageResult(state=SimpleState(payload=payload)))
+    cache.put("b", StageResult(state=SimpleState(payload=payload)))
+    assert time.perf_counter() - start >= 0.05
+    cache.close()
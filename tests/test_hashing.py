@@ -1,10 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+
+import numpy as np
 import pytest
 
-from phys_pipeline.hashing import hash_dag_node, hash_model, hash_policy, hash_state
+from phys_pipeline.cache import DiskCache
+from phys_pipeline.dag_cache import DagCache
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.hashing import (
+    HASH_ENGINES,
+    HashEngine,
+    hash_dag_node,
+    hash_model,
+    hash_ndarray,
+    hash_policy,
+    hash_state,
+)
 from phys_pipeline.policy import PolicyBag
-from phys_pipeline.types import SimpleState, StageConfig
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
 
 
 class HashCfg(StageConfig):
@@ -53,3 +68,53 @@ def test_hash_dag_node_is_stable():
         policy_hash=None,
     )
     assert key1 == key2
+
+
+class ScaleStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=SimpleState(payload=state.payload * 2))
+
+
+@pytest.mark.fast
+def test_v2_hash_engine_keeps_legacy_array_digests():
+    a = np.arange(12.0).reshape(3, 4)[:, ::2]
+    legacy = hashlib.sha256()
+    legacy.update(b"float64")
+    legacy.update(b"(3, 2)")
+    legacy.update(np.ascontiguousarray(a).data)
+    assert HASH_ENGINES["v2"].hash_array(a) == legacy.digest()
+    assert hash_ndarray(a) == legacy.digest()
+
+
+@pytest.mark.fast
+def test_tree_hash_ignores_layout_and_worker_count():
+    a = np.random.default_rng(0).random((64, 48))
+    serial = HashEngine(algorithm="blake2b", chunk_bytes=1024, workers=1)
+    threaded = HashEngine(algorithm="blake2b", chunk_bytes=1024, workers=4)
+    assert serial.hash_array(a) == threaded.hash_array(a)
+    assert serial.hash_array(a) == serial.hash_array(np.asfortranarray(a))
+    assert serial.hash_array(a[:, ::3]) == threaded.hash_array(a[:, ::3].copy())
+    assert serial.hash_array(a) != serial.hash_array(a + 1e-12)
+    assert serial.hash_array(a) != HASH_ENGINES["v2"].hash_array(a)
+
+
+def test_cache_version_selects_hash_engine_and_keys(tmp_path):
+    nodes = [NodeSpec(id="a", stage=ScaleStage(StageConfig()))]
+    state = SimpleState(payload=np.arange(1000.0))
+    cache = DagCache(DiskCache(tmp_path))
+
+    def run(cache_version):
+        executor = DagExecutor(
+            scheduler=LocalScheduler(max_workers=1, max_cpu=1),
+            cache=cache,
+            key_mode="recipe",
+            cache_version=cache_version,
+        )
+        return executor.run(state, nodes).provenance["cache_plan"]
+
+    assert run("v2") == {"hit": 0, "run": 1, "skip": 0}
+    assert run("v3") == {"hit": 0, "run": 1, "skip": 0}
+    assert run("v2") == {"hit": 1, "run": 0, "skip": 0}
+    assert hash_state(state, HASH_ENGINES["v3"]) != hash_state(state)
+    with pytest.raises(ValueError, match="cache_version"):
+        DagExecutor(cache_version="v0")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.incremental import IncrementalDagSession
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+CALLS: list[str] = []
+
+
+class AddConfig(StageConfig):
+    amount: int = 1
+
+
+class AddStage(PipelineStage[SimpleState, AddConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        CALLS.append(self.cfg.name)
+        return StageResult(state=SimpleState(payload=state.payload + self.cfg.amount))
+
+
+def _nodes(c_amount: int = 3):
+    return [
+        NodeSpec(id="a", stage=AddStage(AddConfig(name="a", amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(name="b", amount=2))),
+        NodeSpec(id="c", deps=["a"], stage=AddStage(AddConfig(name="c", amount=c_amount))),
+        NodeSpec(id="d", deps=["c"], stage=AddStage(AddConfig(name="d", amount=4))),
+    ]
+
+
+def test_incremental_session_reruns_only_dirty_subgraph():
+    session = IncrementalDagSession()
+    CALLS.clear()
+    first = session.run(SimpleState(payload=0), _nodes())
+    assert sorted(CALLS) == ["a", "b", "c", "d"]
+    assert first.results["d"].state.payload == 8
+
+    assert session.diff(SimpleState(payload=0), _nodes(c_amount=10)) == ["c", "d"]
+
+    CALLS.clear()
+    second = session.run(SimpleState(payload=0), _nodes(c_amount=10))
+    assert sorted(CALLS) == ["c", "d"]
+    assert second.results["d"].state.payload == 15
+    assert second.results["b"].state.payload == 3
+    assert second.provenance["incremental"]["dirty"] == ["c", "d"]
+
+
+def test_incremental_session_unchanged_graph_runs_nothing():
+    session = IncrementalDagSession()
+    session.run(SimpleState(payload=0), _nodes())
+    CALLS.clear()
+    again = session.run(SimpleState(payload=0), _nodes())
+    assert CALLS == []
+    assert session.last_dirty == []
+    assert again.results["d"].state.payload == 8
+
+
+def test_incremental_session_new_initial_state_dirties_everything():
+    session = IncrementalDagSession()
+    session.run(SimpleState(payload=0), _nodes())
+    assert session.diff(SimpleState(payload=1), _nodes()) == ["a", "b", "c", "d"]
+
+
+def test_incremental_session_reuses_warm_executor():
+    with DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2)) as executor:
+        session = IncrementalDagSession(lambda: executor)
+        session.run(SimpleState(payload=0), _nodes())
+        CALLS.clear()
+        result = session.run(SimpleState(payload=0), _nodes(c_amount=10))
+    assert sorted(CALLS) == ["c", "d"]
+    assert result.results["d"].state.payload == 15
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+
+from phys_pipeline.errors import SchedulerRetryError
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.journal import RunJournal
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class AddConfig(StageConfig):
+    amount: int = 1
+
+
+class CountingAddStage(PipelineStage[SimpleState, AddConfig]):
+    calls = 0
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        type(self).calls += 1
+        return StageResult(state=SimpleState(payload=state.payload + self.cfg.amount))
+
+
+class CrashStage(PipelineStage[SimpleState, AddConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        raise RuntimeError("crash")
+
+
+def _chain(last: PipelineStage) -> list[NodeSpec]:
+    return [
+        NodeSpec(id="a", stage=CountingAddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=CountingAddStage(AddConfig(amount=2))),
+        NodeSpec(id="c", deps=["b"], stage=last),
+    ]
+
+
+def _executor() -> DagExecutor:
+    return DagExecutor(scheduler=LocalScheduler(max_workers=1))
+
+
+def test_resume_skips_journaled_nodes(tmp_path):
+    CountingAddStage.calls = 0
+    with RunJournal(tmp_path / "journal") as journal:
+        with pytest.raises(SchedulerRetryError, match="crash"):
+            _executor().run(
+                SimpleState(payload=0), _chain(CrashStage(AddConfig(amount=3))), journal=journal
+            )
+        assert set(journal.completed()) == {"a", "b"}
+        assert CountingAddStage.calls == 2
+
+    with RunJournal(tmp_path / "journal") as journal:
+        result = _executor().resume(
+            journal, SimpleState(payload=0), _chain(CountingAddStage(AddConfig(amount=3)))
+        )
+
+    assert result.results["c"].state.payload == 6
+    assert CountingAddStage.calls == 3
+    seeded = {run["node_id"] for run in result.provenance["node_runs"] if run["seeded"]}
+    assert seeded == {"b"}
+
+
+def test_resume_reruns_nodes_whose_recipe_changed(tmp_path):
+    with RunJournal(tmp_path) as journal:
+        _executor().run(
+            SimpleState(payload=0), _chain(CountingAddStage(AddConfig())), journal=journal
+        )
+        CountingAddStage.calls = 0
+        result = _executor().resume(
+            journal, SimpleState(payload=10), _chain(CountingAddStage(AddConfig()))
+        )
+
+    assert result.results["c"].state.payload == 14
+    assert CountingAddStage.calls == 3
+
+
+def test_journal_ignores_torn_final_line(tmp_path):
+    with RunJournal(tmp_path) as journal:
+        journal.record("a", "k1", StageResult(state=SimpleState(payload=1)))
+    with (tmp_path / "journal.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write('{"node_id":"b","ke')
+
+    journal = RunJournal(tmp_path)
+    assert list(journal.completed()) == ["a"]
+    assert journal.load(journal.completed()["a"]).state.payload == 1
+    journal.close()
+
+
+def test_journal_batches_fsync(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr("phys_pipeline.journal.os.fsync", calls.append)
+    journal = RunJournal(tmp_path, fsync_every=3, fsync_interval_s=3600)
+    for index in range(7):
+        journal.record_failure(f"n{index}", f"k{index}", "boom")
+    assert len(calls) == 2
+    journal.close()
+    assert len(calls) == 3
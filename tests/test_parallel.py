@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.parallel import merge_results, split_state
+from phys_pipeline.scheduler import LocalScheduler, ProcessScheduler
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class TraceRaysStage(PipelineStage[SimpleState, StageConfig]):
+    def can_parallelize_over(self) -> str | None:
+        return "payload"
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        rays = state.payload * state.meta["scale"]
+        meta = {**state.meta, "hits": state.meta["weights"] > 0.5}
+        return StageResult(
+            state=SimpleState(payload=rays, meta=meta), metrics={"n_rays": len(rays)}
+        )
+
+
+class BarrierStage(TraceRaysStage):
+    barrier = threading.Barrier(4, timeout=5)
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        self.barrier.wait()
+        return super().process(state, policy=policy)
+
+
+def _rays(n: int = 10) -> SimpleState:
+    return SimpleState(
+        payload=np.arange(n * 3, dtype=float).reshape(n, 3),
+        meta={"weights": np.linspace(0, 1, n), "scale": 2.0},
+    )
+
+
+def test_split_state_slices_aligned_arrays():
+    chunks = split_state(_rays(), "payload", 3)
+
+    assert chunks is not None
+    assert [len(chunk.payload) for chunk in chunks] == [3, 3, 4]
+    assert [len(chunk.meta["weights"]) for chunk in chunks] == [3, 3, 4]
+    assert all(chunk.meta["scale"] == 2.0 for chunk in chunks)
+    assert split_state(_rays(1), "payload", 4) is None
+    assert split_state(SimpleState(payload=3), "payload", 4) is None
+
+
+def test_merge_results_concatenates_and_sums_metrics():
+    stage = TraceRaysStage(StageConfig())
+    state = _rays()
+    chunks = split_state(state, "payload", 4)
+    merged = merge_results(stage, "payload", chunks, [stage.process(c) for c in chunks])
+    expected = stage.process(state)
+
+    np.testing.assert_array_equal(merged.state.payload, expected.state.payload)
+    np.testing.assert_array_equal(merged.state.meta["hits"], expected.state.meta["hits"])
+    assert merged.metrics == {"n_rays": 10.0}
+    assert merged.provenance["chunks"] == 4
+
+
+def test_executor_runs_chunks_concurrently():
+    # The barrier only opens if all four chunks are in flight at once.
+    nodes = [NodeSpec(id="trace", stage=BarrierStage(StageConfig()))]
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=4, max_cpu=4))
+    result = executor.run(_rays(), nodes)
+
+    np.testing.assert_array_equal(result.results["trace"].state.payload, _rays().payload * 2)
+    assert result.metrics["trace.n_rays"] == 10.0
+    assert result.results["trace"].provenance["chunks"] == 4
+
+
+def test_executor_chunks_adapt_to_free_workers():
+    nodes = [NodeSpec(id="trace", stage=TraceRaysStage(StageConfig()))]
+    result = DagExecutor(scheduler=LocalScheduler(max_workers=4, max_cpu=4), max_chunks=2).run(
+        _rays(), nodes
+    )
+    assert result.results["trace"].provenance["chunks"] == 2
+
+    result = DagExecutor().run(_rays(), nodes)
+    assert "chunks" not in result.results["trace"].provenance
+
+
+def test_executor_chunks_on_process_scheduler():
+    nodes = [NodeSpec(id="trace", stage=TraceRaysStage(StageConfig()))]
+    executor = DagExecutor(scheduler=ProcessScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(_rays(), nodes)
+
+    np.testing.assert_array_equal(result.results["trace"].state.payload, _rays().payload * 2)
+    assert result.results["trace"].provenance["chunks"] == 2
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from phys_pipeline.dag import PipelineGraph, build_dag
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.priority import (
+    ReadyQueue,
+    fifo,
+    largest_resource_first,
+    shortest_job_first,
+    upward_rank,
+)
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.types import (
+    NodeResources,
+    NodeSpec,
+    PipelineStage,
+    SimpleState,
+    StageConfig,
+    StageResult,
+)
+
+
+class CostConfig(StageConfig):
+    cost: float = 1.0
+
+
+STARTED: list[str] = []
+
+
+class CostStage(PipelineStage[SimpleState, CostConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        STARTED.append(self.cfg.name)
+        return StageResult(state=state)
+
+    def estimated_cost(self) -> float:
+        return self.cfg.cost
+
+
+def _skewed_nodes():
+    costs = {"short1": 1.0, "short2": 1.0, "head": 2.0, "tail": 5.0}
+    return [
+        NodeSpec(
+            id=node_id,
+            deps=["head"] if node_id == "tail" else [],
+            stage=CostStage(CostConfig(name=node_id, cost=cost)),
+        )
+        for node_id, cost in costs.items()
+    ]
+
+
+@pytest.mark.fast
+def test_upward_rank_is_longest_cost_path_to_sink():
+    rank = upward_rank(build_dag(_skewed_nodes()))
+    assert rank == {"short1": 1.0, "short2": 1.0, "head": 7.0, "tail": 5.0}
+
+
+@pytest.mark.fast
+def test_alternative_priorities():
+    nodes = _skewed_nodes() + [
+        NodeSpec(id="wide", stage=CostStage(CostConfig()), resources=NodeResources(cpu=4))
+    ]
+    dag = build_dag(nodes)
+    assert shortest_job_first(dag)["short1"] > shortest_job_first(dag)["tail"]
+    assert max(largest_resource_first(dag).items(), key=lambda kv: kv[1])[0] == "wide"
+    assert set(fifo(dag).values()) == {0.0}
+
+
+@pytest.mark.fast
+def test_ready_queue_breaks_ties_in_insertion_order():
+    queue = ReadyQueue({"b": 2.0}, ["a", "c", "b"])
+    assert [queue.pop() for _ in range(len(queue))] == ["b", "a", "c"]
+
+
+def test_executor_dispatches_critical_path_first():
+    STARTED.clear()
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1))
+    executor.run(SimpleState(payload=0), _skewed_nodes())
+    assert STARTED[0] == "head"
+
+
+def test_executor_fifo_priority_keeps_insertion_order():
+    STARTED.clear()
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=1, max_cpu=1), priority=fifo)
+    executor.run(SimpleState(payload=0), _skewed_nodes())
+    assert STARTED[:3] == ["short1", "short2", "head"]
+
+
+def test_compiled_graph_reuses_priorities_across_runs():
+    calls = []
+
+    def counted_rank(dag):
+        calls.append(1)
+        return upward_rank(dag)
+
+    graph = PipelineGraph.from_nodes(_skewed_nodes())
+    scheduler = LocalScheduler(max_workers=1, max_cpu=1)
+    with DagExecutor(scheduler=scheduler, priority=counted_rank) as executor:
+        for _ in range(3):
+            STARTED.clear()
+            executor.run(SimpleState(payload=0), graph)
+            assert STARTED[0] == "head"
+    assert len(calls) == 1
+
+
+class HoldConfig(StageConfig):
+    hold_s: float = 0.0
+
+
+class HoldStage(PipelineStage[SimpleState, HoldConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        STARTED.append(self.cfg.name)
+        time.sleep(self.cfg.hold_s)
+        return StageResult(state=state)
+
+
+def _mixed_size_nodes():
+    # "hold" occupies 2 of 4 CPUs, so the 4-CPU "big" node cannot start until it ends.
+    spec = {"hold": (2, 0.2), "big": (4, 0.0), "s1": (1, 0.05), "s2": (1, 0.05), "s3": (1, 0.0)}
+    return [
+        NodeSpec(
+            id=node_id,
+            stage=HoldStage(HoldConfig(name=node_id, hold_s=hold_s)),
+            resources=NodeResources(cpu=cpu),
+        )
+        for node_id, (cpu, hold_s) in spec.items()
+    ]
+
+
+def _insertion_order(dag):
+    return {node_id: -float(i) for i, node_id in enumerate(dag.nodes_by_id)}
+
+
+def _run_mixed(backfill_limit):
+    STARTED.clear()
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=4, max_cpu=4),
+        priority=_insertion_order,
+        backfill_limit=backfill_limit,
+    )
+    executor.run(SimpleState(payload=0), _mixed_size_nodes())
+    return list(STARTED)
+
+
+def test_executor_backfills_small_nodes_around_blocked_head():
+    started = _run_mixed(backfill_limit=8)
+    assert started[-1] == "big"
+
+
+def test_backfill_limit_reserves_capacity_for_blocked_head():
+    started = _run_mixed(backfill_limit=1)
+    assert started.index("s1") < started.index("big") < started.index("s2")
+
+
+class CountingScheduler(LocalScheduler):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.try_submits = 0
+
+    def try_submit(self, *args, **kwargs):
+        self.try_submits += 1
+        return super().try_submit(*args, **kwargs)
+
+
+def test_dispatch_stops_scanning_when_capacity_is_exhausted():
+    nodes = [NodeSpec(id=f"n{i}", stage=CostStage(CostConfig(name=f"n{i}"))) for i in range(200)]
+    scheduler = CountingScheduler(max_workers=2, max_cpu=2)
+    DagExecutor(scheduler=scheduler).run(SimpleState(payload=0), nodes)
+    assert scheduler.try_submits <= 2 * len(nodes)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+import phys_pipeline.dag as dag_module
+from phys_pipeline.errors import SchedulerRetryError
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class AddConfig(StageConfig):
+    amount: int = 1
+
+
+class AddStage(PipelineStage[SimpleState, AddConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        if state.payload < 0:
+            raise RuntimeError("negative sample")
+        return StageResult(state=SimpleState(payload=state.payload + self.cfg.amount))
+
+
+class BarrierStage(PipelineStage[SimpleState, StageConfig]):
+    barrier = threading.Barrier(4, timeout=5)
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        self.barrier.wait()
+        return StageResult(state=state)
+
+
+def _chain() -> list[NodeSpec]:
+    return [
+        NodeSpec(id="a", stage=AddStage(AddConfig(amount=1))),
+        NodeSpec(id="b", deps=["a"], stage=AddStage(AddConfig(amount=10))),
+    ]
+
+
+def test_run_many_compiles_once_and_keeps_member_order(monkeypatch):
+    calls = []
+    build_dag = dag_module.build_dag
+    monkeypatch.setattr(dag_module, "build_dag", lambda nodes: calls.append(1) or build_dag(nodes))
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=4, max_cpu=4))
+
+    results = executor.run_many([SimpleState(payload=i) for i in range(20)], _chain())
+
+    assert [r.results["b"].state.payload for r in results] == [i + 11 for i in range(20)]
+    assert len(calls) == 1
+
+
+def test_run_many_interleaves_members_on_shared_pool():
+    # Four single-node members only pass the barrier if their nodes run concurrently.
+    nodes = [NodeSpec(id="a", stage=BarrierStage(StageConfig()))]
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=4, max_cpu=4))
+
+    streamed = list(executor.run_many_iter([SimpleState(payload=i) for i in range(4)], nodes))
+
+    assert sorted(index for index, _ in streamed) == [0, 1, 2, 3]
+    assert {r.results["a"].state.payload for _, r in streamed} == {0, 1, 2, 3}
+
+
+def test_run_many_stops_on_failing_member():
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+    states = [SimpleState(payload=i) for i in (1, 2, -1, 3)]
+
+    with pytest.raises(SchedulerRetryError, match="negative sample"):
+        executor.run_many(states, _chain())
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import functools
+import os
+import threading
 import time
 
+import numpy as np
 import pytest
 
-from phys_pipeline.scheduler import LocalScheduler
-from phys_pipeline.types import NodeResources
+from phys_pipeline.errors import SchedulerError, SchedulerWorkerCrashError
+from phys_pipeline.scheduler import LocalScheduler, MemoryTracker, ProcessScheduler
+from phys_pipeline.types import NodeResources, SimpleState, StageResult
 
 
 def test_local_scheduler_runs_jobs():
@@ -16,6 +21,19 @@ def test_local_scheduler_runs_jobs():
     scheduler.shutdown()
 
 
+def test_local_scheduler_try_submit_and_capacity():
+    scheduler = LocalScheduler(max_workers=2, max_cpu=2)
+    gate = threading.Event()
+    handle = scheduler.try_submit("big", gate.wait, NodeResources(cpu=2))
+    assert handle is not None
+    assert scheduler.capacity().cpu == 0
+    assert scheduler.try_submit("small", lambda: 1, NodeResources(cpu=1)) is None
+    gate.set()
+    scheduler.wait_any([handle])
+    assert scheduler.capacity().cpu == 2
+    scheduler.shutdown()
+
+
 def test_local_scheduler_resource_limits():
     scheduler = LocalScheduler(max_workers=2, max_cpu=1)
     start = time.perf_counter()
@@ -39,3 +57,107 @@ def test_local_scheduler_gpu_limit_error():
     with pytest.raises(Exception):
         scheduler.submit("job1", lambda: 1, NodeResources(gpu=1))
     scheduler.shutdown()
+
+
+def test_local_scheduler_memory_budget():
+    scheduler = LocalScheduler(max_workers=4, max_cpu=4, max_memory_gb=4.0)
+    gate = threading.Event()
+    handle = scheduler.try_submit("heavy1", gate.wait, NodeResources(memory_gb=3.0))
+    assert handle is not None
+    assert scheduler.capacity().memory_gb == pytest.approx(1.0)
+    assert scheduler.try_submit("heavy2", lambda: 1, NodeResources(memory_gb=3.0)) is None
+    light = scheduler.try_submit("light", lambda: 1, NodeResources(memory_gb=0.5))
+    assert light is not None
+    with pytest.raises(SchedulerError):
+        scheduler.submit("huge", lambda: 1, NodeResources(memory_gb=8.0))
+    gate.set()
+    scheduler.wait_any([handle])
+    assert scheduler.try_submit("heavy2", lambda: 1, NodeResources(memory_gb=3.0)) is not None
+    scheduler.shutdown()
+
+
+def _allocate(nbytes):
+    return int(np.ones(nbytes, dtype=np.uint8).sum())
+
+
+def test_local_scheduler_measured_memory_feeds_estimate():
+    tracker = MemoryTracker()
+    scheduler = LocalScheduler(max_workers=1, max_cpu=1, max_memory_gb=1.0, memory_tracker=tracker)
+    nbytes = 8 << 20
+    handle = scheduler.submit("alloc", functools.partial(_allocate, nbytes), NodeResources())
+    assert scheduler.wait_any([handle]).future.result() == nbytes
+    assert tracker.estimate("alloc") >= nbytes / 2**30
+
+    gate = threading.Event()
+    handle = scheduler.submit("alloc", gate.wait, NodeResources())
+    assert handle.resources.memory_gb == tracker.estimate("alloc")
+    assert scheduler.capacity().memory_gb == pytest.approx(1.0 - tracker.estimate("alloc"))
+    gate.set()
+    scheduler.wait_any([handle])
+    scheduler.shutdown()
+
+
+def test_process_scheduler_measures_memory_in_worker():
+    tracker = MemoryTracker()
+    scheduler = ProcessScheduler(max_workers=1, max_cpu=1, memory_tracker=tracker)
+    nbytes = 8 << 20
+    handle = scheduler.submit("alloc", functools.partial(_allocate, nbytes), NodeResources())
+    assert scheduler.wait_any([handle]).future.result() == nbytes
+    scheduler.shutdown()
+    assert tracker.estimate("alloc") >= nbytes / 2**30
+
+
+def _square(x):
+    return x * x
+
+
+def _crash_once(marker):
+    if not marker.exists():
+        marker.write_text("crashed")
+        os._exit(1)
+    return "ok"
+
+
+def _double_state(state):
+    return StageResult(state=SimpleState(payload=state.payload * 2, meta=dict(state.meta)))
+
+
+def test_process_scheduler_runs_jobs():
+    scheduler = ProcessScheduler(max_workers=2, max_cpu=2)
+    handle = scheduler.submit("job1", functools.partial(_square, 7), NodeResources())
+    completed = scheduler.wait_any([handle])
+    assert completed.future.result() == 49
+    scheduler.shutdown()
+
+
+def test_process_scheduler_moves_arrays_through_shared_memory():
+    scheduler = ProcessScheduler(max_workers=1, max_cpu=1, shm_min_bytes=0)
+    payload = np.arange(100_000, dtype=np.float64)
+    state = SimpleState(payload=payload, meta={"omega": np.linspace(0, 1, 16)})
+    handle = scheduler.submit("job1", functools.partial(_double_state, state), NodeResources())
+    result = scheduler.wait_any([handle]).future.result()
+    scheduler.shutdown()
+
+    np.testing.assert_array_equal(result.state.payload, payload * 2)
+    np.testing.assert_array_equal(result.state.meta["omega"], np.linspace(0, 1, 16))
+
+
+def test_process_scheduler_respawns_crashed_worker(tmp_path):
+    scheduler = ProcessScheduler(max_workers=1, max_cpu=1, max_crash_retries=1)
+    marker = tmp_path / "marker"
+    handle = scheduler.submit("job1", functools.partial(_crash_once, marker), NodeResources())
+    assert scheduler.wait_any([handle]).future.result() == "ok"
+    assert scheduler.respawns == 1
+    follow_up = scheduler.submit("job2", functools.partial(_square, 3), NodeResources())
+    assert scheduler.wait_any([follow_up]).future.result() == 9
+    scheduler.shutdown()
+
+
+def test_process_scheduler_gives_up_after_repeated_crashes(tmp_path):
+    scheduler = ProcessScheduler(max_workers=1, max_cpu=1, max_crash_retries=0)
+    handle = scheduler.submit(
+        "job1", functools.partial(_crash_once, tmp_path / "marker"), NodeResources()
+    )
+    with pytest.raises(SchedulerWorkerCrashError):
+        scheduler.wait_any([handle]).future.result()
+    scheduler.shutdown()
@@ -1,6 +1,13 @@
 from __future__ import annotations
 
-from phys_pipeline.sweep import SweepSpec, expand_sweep
+import numpy as np
+import pytest
+
+from phys_pipeline.cache import DiskCache
+from phys_pipeline.dag_cache import DagCache
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.scheduler import LocalScheduler, ProcessScheduler
+from phys_pipeline.sweep import LazySweep, SweepSpec, expand_sweep
 from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
 
 
@@ -24,3 +31,167 @@ def test_expand_sweep_creates_nodes():
     ids = {node.id for node in expanded}
     assert "scale__scale-1.0" in ids
     assert "scale__scale-2.0" in ids
+
+
+class BatchScaleStage(ScaleStage):
+    batches: list[int] = []
+
+    def process_batch(self, states, cfgs, *, policy=None):
+        type(self).batches.append(len(cfgs))
+        scales = np.array([cfg.scale for cfg in cfgs])
+        payloads = np.stack([state.payload for state in states]) * scales[:, None]
+        return [StageResult(state=SimpleState(payload=p)) for p in payloads]
+
+
+def _batched_sweep(n: int, batch_size: int) -> list[NodeSpec]:
+    base = NodeSpec(id="scale", deps=["src"], stage=BatchScaleStage(ScaleConfig()))
+    source = NodeSpec(id="src", stage=ScaleStage(ScaleConfig(scale=1.0)))
+    spec = SweepSpec(node_id="scale", param_grid={"scale": [float(i) for i in range(n)]})
+    return expand_sweep([source, base], [spec], batch_size=batch_size)
+
+
+def test_batched_sweep_runs_process_batch_per_group(tmp_path):
+    BatchScaleStage.batches = []
+    cache = DagCache(DiskCache(tmp_path))
+    nodes = _batched_sweep(10, batch_size=4)
+    result = DagExecutor(cache=cache).run(SimpleState(payload=np.ones(3)), nodes)
+
+    assert sorted(BatchScaleStage.batches) == [2, 4, 4]
+    for i in range(10):
+        np.testing.assert_array_equal(
+            result.results[f"scale__scale-{float(i)}"].state.payload, np.full(3, float(i))
+        )
+
+    # Every variant got its own cache entry.
+    BatchScaleStage.batches = []
+    rerun = DagExecutor(cache=cache).run(SimpleState(payload=np.ones(3)), nodes)
+    assert BatchScaleStage.batches == []
+    assert all(run["cache_hit"] for run in rerun.provenance["node_runs"] if run["node_id"] != "src")
+
+
+def test_batched_sweep_on_process_scheduler():
+    nodes = _batched_sweep(6, batch_size=3)
+    executor = DagExecutor(scheduler=ProcessScheduler(max_workers=2, max_cpu=2))
+    result = executor.run(SimpleState(payload=np.ones(3)), nodes)
+
+    assert result.results["scale__scale-5.0"].state.payload.tolist() == [5.0, 5.0, 5.0]
+
+
+class CountingSourceStage(ScaleStage):
+    calls = 0
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        type(self).calls += 1
+        return super().process(state, policy=policy)
+
+
+def test_lazy_sweep_decodes_in_expand_sweep_order():
+    base = NodeSpec(id="scale", stage=ScaleStage(ScaleConfig()))
+    grid = {"scale": [1.0, 2.0, 3.0], "name": ["a", "b"]}
+    sweep = LazySweep([base], SweepSpec(node_id="scale", param_grid=grid))
+    expanded = expand_sweep([base], [SweepSpec(node_id="scale", param_grid=grid)])
+
+    assert len(sweep) == 6
+    assert [sweep.decode(i) for i in range(6)] == [node.metadata["sweep"] for node in expanded]
+    assert sweep.node(4).id == "scale#4"
+    assert sweep.decode(4) == {"name": "b", "scale": 2.0}
+    assert sweep.index_of("scale#4") == 4
+
+
+def test_run_sweep_streams_variants_in_windows():
+    CountingSourceStage.calls = 0
+    nodes = [
+        NodeSpec(id="src", stage=CountingSourceStage(ScaleConfig(scale=2.0))),
+        NodeSpec(id="scale", deps=["src"], stage=ScaleStage(ScaleConfig())),
+    ]
+    grid = {"scale": [float(i) for i in range(50)]}
+    sweep = LazySweep(nodes, SweepSpec(node_id="scale", param_grid=grid), batch_size=4)
+    executor = DagExecutor(scheduler=LocalScheduler(max_workers=2, max_cpu=2))
+
+    seen = {}
+    for event in executor.run_sweep(SimpleState(payload=np.ones(2)), sweep, window=8):
+        seen[event.variant] = event.result.state.payload[0]
+
+    assert CountingSourceStage.calls == 1
+    assert seen == {i: 2.0 * i for i in range(50)}
+
+
+class AddConfig(StageConfig):
+    amount: float = 0.0
+
+
+class AddStage(PipelineStage[SimpleState, AddConfig]):
+    calls: dict[str, int] = {}
+
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        type(self).calls[self.cfg.name] = type(self).calls.get(self.cfg.name, 0) + 1
+        return StageResult(state=SimpleState(payload=state.payload + self.cfg.amount))
+
+
+class SumStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=SimpleState(payload=sum(s.payload for s in state.inputs.values())))
+
+
+def _add(node_id: str, deps: list[str], amount: float = 0.0) -> NodeSpec:
+    return NodeSpec(id=node_id, deps=deps, stage=AddStage(AddConfig(name=node_id, amount=amount)))
+
+
+def test_expand_sweep_clones_downstream_and_shares_upstream():
+    AddStage.calls = {}
+    nodes = [
+        _add("src", [], 1.0),
+        _add("b", ["src"]),
+        _add("c", ["b"], 100.0),
+        _add("other", ["src"], 10.0),
+        NodeSpec(id="d", deps=["c", "other"], stage=SumStage(StageConfig())),
+    ]
+    expanded = expand_sweep(nodes, [SweepSpec(node_id="b", param_grid={"amount": [1, 2]})])
+    by_id = {node.id: node for node in expanded}
+
+    assert set(by_id) == {
+        "src",
+        "other",
+        *(f"{n}__amount-{v}" for n in ("b", "c", "d") for v in (1, 2)),
+    }
+    assert by_id["d__amount-2"].deps == ["c__amount-2", "other"]
+
+    result = DagExecutor().run(SimpleState(payload=0.0), expanded)
+    assert result.results["d__amount-1"].state.payload == 1 + 1 + 100 + 1 + 10
+    assert result.results["d__amount-2"].state.payload == 1 + 2 + 100 + 1 + 10
+    assert AddStage.calls["src"] == 1
+    assert AddStage.calls["other"] == 1
+
+
+def test_expand_sweep_joint_product_and_zip():
+    nodes = [
+        _add("src", []),
+        _add("p", ["src"]),
+        _add("q", ["src"]),
+        NodeSpec(id="m", deps=["p", "q"], stage=SumStage(StageConfig())),
+    ]
+    specs = [
+        SweepSpec(node_id="p", param_grid={"amount": [1, 2]}),
+        SweepSpec(node_id="q", param_grid={"amount": [10, 20]}),
+    ]
+
+    product = expand_sweep(nodes, specs)
+    merged = [node for node in product if node.id.startswith("m__")]
+    assert len(merged) == 4
+    assert sum(node.id.startswith("p__") for node in product) == 2
+    assert {"amount": 10} in [n.metadata["sweep_point"]["q"] for n in merged]
+
+    zipped = expand_sweep(nodes, specs, mode="zip")
+    assert sorted(node.id for node in zipped if node.id.startswith("m__")) == [
+        "m__amount-1__amount-10",
+        "m__amount-2__amount-20",
+    ]
+    result = DagExecutor().run(SimpleState(payload=0.0), zipped)
+    assert result.results["m__amount-2__amount-20"].state.payload == 22
+
+    with pytest.raises(ValueError, match="same number"):
+        expand_sweep(
+            nodes,
+            [specs[0], SweepSpec(node_id="q", param_grid={"amount": [10, 20, 30]})],
+            mode="zip",
+        )
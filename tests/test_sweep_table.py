@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import numpy as np
+
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.sweep import LazySweep, SweepSpec, expand_sweep
+from phys_pipeline.sweep_table import SweepTable
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class FitConfig(StageConfig):
+    x: float = 0.0
+    kind: str = "a"
+
+
+class FitStage(PipelineStage[SimpleState, FitConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=state, metrics={"loss": (self.cfg.x - 0.5) ** 2})
+
+
+def _table() -> SweepTable:
+    table = SweepTable(capacity=2)
+    for i in range(5):
+        metrics = {"loss": float(i)} if i < 3 else {"loss": float(i), "late": 1.0}
+        table.append(i, {"x": i * 0.5, "kind": "ab"[i % 2]}, metrics)
+    return table
+
+
+def test_append_grows_columns_and_backfills_new_metrics():
+    table = _table()
+
+    assert len(table) == 5
+    np.testing.assert_array_equal(table.variant, np.arange(5))
+    np.testing.assert_array_equal(table.params["x"], np.arange(5) * 0.5)
+    assert table.params["kind"].tolist() == ["a", "b", "a", "b", "a"]
+    np.testing.assert_array_equal(table.metrics["late"], [np.nan, np.nan, np.nan, 1.0, 1.0])
+    assert table.best("loss") == 0
+    assert table.row(4)["x"] == 2.0
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    table = _table()
+    table.save(tmp_path / "table")
+    loaded = SweepTable.load(tmp_path / "table", mmap_mode="r")
+
+    assert isinstance(loaded.metrics["loss"], np.memmap)
+    np.testing.assert_array_equal(loaded.params["x"], table.params["x"])
+    assert loaded.best("loss", mode="max") == 4
+
+    archive = table.save(tmp_path / "table.npz")
+    np.testing.assert_array_equal(SweepTable.load(archive).metrics["late"], table.metrics["late"])
+
+    # A loaded table can keep growing.
+    loaded.append(5, {"x": 9.0, "kind": "c"}, {"loss": -1.0})
+    assert loaded.best("loss") == 5
+
+
+def test_run_sweep_fills_table():
+    base = NodeSpec(id="fit", stage=FitStage(FitConfig()))
+    grid = {"x": [i / 10 for i in range(11)], "kind": ["a", "b"]}
+    sweep = LazySweep([base], SweepSpec(node_id="fit", param_grid=grid))
+    table = SweepTable()
+
+    events = list(DagExecutor().run_sweep(SimpleState(), sweep, window=4, table=table))
+
+    assert len(table) == len(events) == 22
+    assert table.row(table.best("loss"))["x"] == 0.5
+    for row, variant in enumerate(table.variant):
+        assert table.params["x"][row] == sweep.decode(int(variant))["x"]
+
+
+def test_from_run_tabulates_expanded_sweep():
+    nodes = expand_sweep(
+        [NodeSpec(id="fit", stage=FitStage(FitConfig()))],
+        [SweepSpec(node_id="fit", param_grid={"x": [0.0, 0.5, 1.0]})],
+    )
+    result = DagExecutor().run(SimpleState(), nodes)
+    table = SweepTable.from_run(nodes, result.results)
+
+    np.testing.assert_array_equal(table.metrics["loss"], [0.25, 0.0, 0.25])
+    np.testing.assert_array_equal(table.params["x"], [0.0, 0.5, 1.0])
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+
+from phys_pipeline.cache import DiskCache
+from phys_pipeline.dag_cache import DagCache
+from phys_pipeline.executor import DagExecutor
+from phys_pipeline.scheduler import LocalScheduler
+from phys_pipeline.trace import NULL_TRACER, Tracer
+from phys_pipeline.types import NodeSpec, PipelineStage, SimpleState, StageConfig, StageResult
+
+
+class IncStage(PipelineStage[SimpleState, StageConfig]):
+    def process(self, state: SimpleState, *, policy=None) -> StageResult[SimpleState]:
+        return StageResult(state=SimpleState(payload=state.payload + 1))
+
+
+def _nodes() -> list[NodeSpec]:
+    return [
+        NodeSpec(id="a", stage=IncStage(StageConfig())),
+        NodeSpec(id="b", deps=["a"], stage=IncStage(StageConfig())),
+    ]
+
+
+def test_tracer_exports_node_phases(tmp_path):
+    tracer = Tracer()
+    cache = DagCache(DiskCache(tmp_path / "cache"))
+    executor = DagExecutor(
+        scheduler=LocalScheduler(max_workers=2, max_cpu=2), cache=cache, tracer=tracer
+    )
+    executor.run(SimpleState(payload=np.zeros(4)), _nodes())
+
+    assert executor.scheduler.tracer is NULL_TRACER
+    assert cache.tracer is NULL_TRACER
+
+    path = tracer.export(tmp_path / "run.trace.json")
+    events = json.loads(path.read_text())["traceEvents"]
+    phases = {(e["name"], e["args"].get("node_id")) for e in events}
+    for node_id in ("a", "b"):
+        for name in ("queue_wait", "pool_wait", "stage", "cache.put"):
+            assert (name, node_id) in phases
+    assert ("hash_state", "a") in phases
+    assert any(name == "cache.write" for name, _ in phases)
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+def test_tracing_is_disabled_by_default():
+    executor = DagExecutor()
+    assert executor.tracer is NULL_TRACER
+    assert executor.scheduler.tracer is NULL_TRACER
+    result = executor.run(SimpleState(payload=np.zeros(2)), _nodes())
+    assert np.allclose(result.results["b"].state.payload, 2.0)
+    assert NULL_TRACER.events == []